@@ -4,21 +4,146 @@ from pathlib import Path
 import sys
 import shutil
 import os
+import re
+import functools
+import multiprocessing
 
-VALID_AUTODOCK_TYPES = {
+VALID_AUTODOCK_TYPES = frozenset({
     'A', 'C', 'NA', 'N', 'OA', 'O', 'SA', 'S', 
     'HD', 'H', 'P', 'F', 'Cl', 'Br', 'I', 
     'Mg', 'Mn', 'Zn', 'Ca', 'Fe'
-}
+})
 
 SUGGESTED_REPLACEMENTS = {
     'Si': 'C'
 }
 
-def check_and_fix_pdbqt_files(directory: Path, perform_fix: bool = False):
+# How many files between updates of the progress line
+PROGRESS_STRIDE = 200
+
+# Directories that are never scanned; pdbqt_backups is where --fix puts the original files
+SKIP_DIRS = frozenset(('.git', '__pycache__', 'pdbqt_backups', '.ipynb_checkpoints'))
+
+# Files are checked as raw bytes, so keep byte versions of the lookups
+_VALID_TYPES_BYTES = frozenset(t.encode() for t in VALID_AUTODOCK_TYPES)
+
+# Record names are the first 6 columns of a PDBQT line
+_ATOM_PREFIXES = frozenset((b"ATOM  ", b"HETATM"))
+
+# Every ATOM/HETATM line in a file, found in one pass by the regex engine
+_ATOM_LINE_RE = re.compile(rb"^(?:ATOM  |HETATM).*$", re.MULTILINE)
+
+def _invalid_types(data):
+    """Bulk check over a whole file: returns the set of atom types that are not valid AutoDock types."""
+    types = set()
+    for line in _ATOM_LINE_RE.findall(data):
+        _, sep, atom_type = line.rstrip().rpartition(b' ')
+        # A bare record name (nothing after "ATOM  "/"HETATM") has no atom type to check
+        if sep:
+            types.add(atom_type)
+    return types - _VALID_TYPES_BYTES
+
+def _find_bad_lines(data, bad_types):
+    """
+    Returns (line_start, atom_type) for every atom line whose last token is one of
+    bad_types, in file order. Each type is searched for as a literal by the regex engine,
+    so big files with a few bad atoms never go through a Python loop over every line.
+    """
+    found = []
+    for atom_type in bad_types:
+        for m in re.finditer(re.escape(atom_type) + rb"[ \t\r\f\v]*$", data, re.MULTILINE):
+            type_start = m.start()
+            line_start = data.rfind(b"\n", 0, type_start) + 1
+            # Must be a whole token after the record name on an ATOM/HETATM line, not the end of a longer one
+            if type_start > line_start and data[type_start - 1] == 0x20 and data[line_start:line_start + 6] in _ATOM_PREFIXES:
+                found.append((line_start, atom_type))
+    found.sort()
+    return found
+
+def _scan(root):
+    """Yields the full path of every .pdbqt file under root, using os.scandir. Unreadable directories are skipped."""
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError as err:
+            # Unreadable directories are skipped (as Path.glob did) instead of stopping the whole scan
+            print(f"\nCould not read directory {d}. Error: {err}")
+            continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    # Skipped directories are never opened at all
+                    if e.name not in SKIP_DIRS:
+                        stack.append(e.path)
+                elif e.name.endswith('.pdbqt'):
+                    yield e.path
+
+def _process_one(file_path, perform_fix=False):
+    """
+    Worker: reads one PDBQT file (as raw bytes) and checks every atom line.
+    Returns (file_path, is_bad, bad_lines_info, new_content_or_None, error_or_None).
+    bad_lines_info is a list of (line_num, atom_type, replacement_or_None).
+    Nothing is written here; the main process does all the writing.
+    """
+    bad_lines_info = []
+    # Stays None for clean files, so no copy of the file is ever built for them
+    lines_to_write = None
+
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+
+        # Fast path: most files are clean, so nothing else is done for them
+        bad_types = _invalid_types(data)
+        if not bad_types:
+            return file_path, False, [], None, None
+
+        if perform_fix:
+            lines_to_write = []
+        pos = 0
+        line_num = 0
+        for start, atom_type in _find_bad_lines(data, bad_types):
+            # Line numbers are counted from the newlines skipped since the last bad line
+            line_num += data.count(b"\n", pos, start)
+            type_name = atom_type.decode(errors="replace")
+            replacement = SUGGESTED_REPLACEMENTS.get(type_name)
+            bad_lines_info.append((line_num, type_name, replacement))
+
+            # The whole line, including its newline
+            end = data.find(b"\n", start) + 1 or len(data)
+            line = data[start:end]
+            if perform_fix:
+                # Everything since the last bad line is unchanged
+                lines_to_write.append(data[pos:start])
+                if replacement is not None:
+                    # --- NEW, SAFER REPLACEMENT LOGIC ---
+                    # This preserves original spacing by only replacing the last word.
+                    # It splits the line only once, from the right, at the atom_type.
+                    line_start = line.rsplit(atom_type, 1)[0]
+                    line_end = b"\r\n" if line.endswith(b"\r\n") else b"\n"
+                    new_line = line_start + replacement.encode() + line_end
+                    lines_to_write.append(new_line)
+                    # ------------------------------------
+                else:
+                    lines_to_write.append(line)
+            pos = end
+            line_num += line.count(b"\n")
+        if lines_to_write is not None:
+            lines_to_write.append(data[pos:])
+    except Exception as e:
+        return file_path, False, [], None, e
+
+    new_content = b"".join(lines_to_write) if lines_to_write is not None else None
+    return file_path, True, bad_lines_info, new_content, None
+
+def check_and_fix_pdbqt_files(directory: Path, perform_fix: bool = False, verbose: bool = False):
     """
     Scans a directory of PDBQT files for invalid atom types and optionally fixes them,
     backing up original files before modification using a robust replacement method.
+    Files are checked in parallel; backups and overwrites happen on the main process.
+    Backups and corrections are counted and summarized at the end; verbose=True also reports each one.
     """
     print(f"Recursively scanning directory: {directory}\n")
     found_bad_files = False
@@ -29,86 +154,91 @@ def check_and_fix_pdbqt_files(directory: Path, perform_fix: bool = False):
         backup_dir.mkdir(exist_ok=True)
         print(f"Original files will be backed up to: {backup_dir}\n")
 
-    pdbqt_files = list(directory.glob("**/*.pdbqt"))
-    total_files = len(pdbqt_files)
-    if not pdbqt_files:
-        print(f"No .pdbqt files found in {directory} or its subdirectories.")
-        return
+    # Filenames already backed up during this run
+    backed_up = set()
+    stats = {'backed_up': 0, 'corrected': 0}
 
-    for i, file_path in enumerate(pdbqt_files):
-        if (i + 1) % 10 == 0 or i == total_files - 1:
-            progress_percent = (i + 1) / total_files * 100
-            sys.stdout.write(f"\rScanning file {i + 1}/{total_files} ({progress_percent:.1f}%)")
-            sys.stdout.flush()
+    # The directory walk feeds the pool as it goes, so the total isn't known up front;
+    # the progress line just counts files, updated every PROGRESS_STRIDE of them
+    processed = 0
+    progress_format = "\rScanned %d files"
+    write = sys.stdout.write
+    flush = sys.stdout.flush
 
-        is_bad_file = False
-        lines_to_write = []
-        
-        try:
-            with open(file_path, 'r') as f:
-                original_lines = f.readlines()
-
-            for line_num, line in enumerate(original_lines):
-                if line.startswith("ATOM") or line.startswith("HETATM"):
-                    parts = line.split()
-                    if len(parts) < 2: continue
-                    
-                    atom_type = parts[-1]
-                    
-                    if atom_type not in VALID_AUTODOCK_TYPES:
-                        if not is_bad_file:
-                            sys.stdout.write("\n")
-                        is_bad_file = True
-                        found_bad_files = True
-                        
-                        relative_path = file_path.relative_to(directory)
-                        print(f"--- Invalid Atom Found in: {relative_path} ---")
-                        print(f"  Line {line_num+1}: Found type '{atom_type}'")
-                        
-                        if perform_fix and atom_type in SUGGESTED_REPLACEMENTS:
-                            replacement = SUGGESTED_REPLACEMENTS[atom_type]
-                            print(f"  Action: Replacing '{atom_type}' with '{replacement}'.")
-                            
-                            # --- NEW, SAFER REPLACEMENT LOGIC ---
-                            # This preserves original spacing by only replacing the last word.
-                            # It splits the line only once, from the right, at the atom_type.
-                            line_start = line.rsplit(atom_type, 1)[0]
-                            new_line = line_start + replacement + "\n"
-                            lines_to_write.append(new_line)
-                            # ------------------------------------
-
-                        else:
-                            lines_to_write.append(line)
-                            if atom_type in SUGGESTED_REPLACEMENTS:
-                                print(f"  Suggestion: Re-run with the --fix flag to replace with '{SUGGESTED_REPLACEMENTS[atom_type]}'.")
-                            else:
-                                print("  Suggestion: No automatic replacement available. You may need to edit this file manually.")
-                        print("-" * (25 + len(str(relative_path))))
-                        
-                    else:
-                        lines_to_write.append(line)
+    worker = functools.partial(_process_one, perform_fix=perform_fix)
+    with multiprocessing.Pool(os.cpu_count()) as pool:
+        results = pool.imap_unordered(worker, _scan(str(directory)), chunksize=64)
+        for file_path, is_bad_file, bad_lines_info, new_content, error in results:
+            processed += 1
+            if processed % PROGRESS_STRIDE == 0:
+                write(progress_format % processed)
+                flush()
+
+            file_path = Path(file_path)
+            if error is not None:
+                sys.stdout.write("\n")
+                print(f"Could not process file {file_path.name}. Error: {error}")
+                continue
+            if not is_bad_file:
+                continue
+
+            found_bad_files = True
+            relative_path = file_path.relative_to(directory)
+            # Everything reported for this file goes out in a single write
+            report = ["\n"]
+            separator = "-" * (25 + len(str(relative_path))) + "\n"
+            for line_num, atom_type, replacement in bad_lines_info:
+                report.append(f"--- Invalid Atom Found in: {relative_path} ---\n")
+                report.append(f"  Line {line_num+1}: Found type '{atom_type}'\n")
+                if perform_fix and replacement is not None:
+                    report.append(f"  Action: Replacing '{atom_type}' with '{replacement}'.\n")
+                elif replacement is not None:
+                    report.append(f"  Suggestion: Re-run with the --fix flag to replace with '{replacement}'.\n")
                 else:
-                    lines_to_write.append(line)
+                    report.append("  Suggestion: No automatic replacement available. You may need to edit this file manually.\n")
+                report.append(separator)
+
+            if new_content is not None:
+                try:
+                    backup_file_path = backup_dir / file_path.name
+                    if file_path.name not in backed_up and not backup_file_path.exists():
+                        try:
+                            # A hard link keeps the original data without copying it
+                            os.link(file_path, backup_file_path)
+                        except OSError:
+                            # Different filesystem (or no hard link support), so copy instead
+                            shutil.copy(file_path, backup_file_path)
+                        backed_up.add(file_path.name)
+                        stats['backed_up'] += 1
+                        if verbose:
+                            report.append(f"  INFO: Original file backed up to '{backup_file_path.name}'.\n")
 
-            if is_bad_file and perform_fix:
-                backup_file_path = backup_dir / file_path.name
-                if not backup_file_path.exists():
-                    shutil.copy(file_path, backup_file_path)
-                    print(f"  INFO: Original file backed up to '{backup_file_path.name}'.")
-                
-                with open(file_path, 'w') as f:
-                    f.writelines(lines_to_write)
-                print(f"SUCCESS: Corrected and overwrote '{file_path.name}'.\n")
+                    # Write a temp file and rename it over the original. The rename is atomic, so an
+                    # interrupted run never leaves a half-written file, and a hard-linked backup keeps the original inode.
+                    tmp_path = file_path.with_name(file_path.name + '.tmp')
+                    with open(tmp_path, 'wb') as f:
+                        f.write(new_content)
+                    os.replace(tmp_path, file_path)
+                    stats['corrected'] += 1
+                    if verbose:
+                        report.append(f"SUCCESS: Corrected and overwrote '{file_path.name}'.\n\n")
+                except Exception as e:
+                    report.append(f"\nCould not process file {file_path.name}. Error: {e}\n")
 
-        except Exception as e:
-            sys.stdout.write("\n")
-            print(f"Could not process file {file_path.name}. Error: {e}")
+            sys.stdout.write("".join(report))
 
+    if not processed:
+        print(f"No .pdbqt files found in {directory} or its subdirectories.")
+        return
+
+    write(progress_format % processed)
     sys.stdout.write("\n")
     if not found_bad_files:
         print("Scan complete. All PDBQT files appear to have valid atom types!")
     else:
         print("Scan complete. Found invalid files listed above.")
+    if perform_fix:
+        print(f"Backed up {stats['backed_up']} originals; corrected {stats['corrected']} files.")
 
 
 def main():
@@ -126,6 +256,11 @@ def main():
         action='store_true', 
         help="If set, automatically replaces known bad atom types and backs up the originals."
     )
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help="With --fix, also report every backup and correction as it happens (default: one summary at the end)."
+    )
     args = parser.parse_args()
 
     target_dir = Path(args.directory)
@@ -133,7 +268,7 @@ def main():
         print(f"Error: Directory not found at '{target_dir}'")
         sys.exit(1)
         
-    check_and_fix_pdbqt_files(target_dir, args.fix)
+    check_and_fix_pdbqt_files(target_dir, args.fix, args.verbose)
 
 if __name__ == "__main__":
     main()
@@ -4,24 +4,109 @@ import sys
 import shutil
 import re
 import os
+import errno
+import threading
 import time
+import bisect
+import itertools
+import hashlib
+import pickle
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-def create_file_index(source_dir: Path):
+# Saved file indexes live here, one pickle per source directory
+INDEX_CACHE_DIR = Path.home() / ".cache" / "pl_dock"
+
+# Protein name from a results filename, e.g. top_dockers_PYR1_3K3K_DOCK.txt
+_PROTEIN_RE = re.compile(r'top_dockers_(.+?)(?:\.txt|$)', re.ASCII)
+# Fallback for RMS files or other formats
+_FALLBACK_RE = re.compile(r'_(PYR1_3K3K_DOCK|PYL2_3KDI_DOCK|1stp_DOCK)', re.ASCII)
+
+# Directories that never hold results worth scanning; pdbqt_backups is made by checkAtomTypesInCache.py
+SKIP_DIRS = frozenset(('.git', '__pycache__', 'pdbqt_backups', '.ipynb_checkpoints'))
+
+def _scan(root, dir_mtimes=None):
+    """
+    Walks a directory tree with os.scandir and yields (filename, full_path)
+    for every .pdbqt file. Much cheaper than Path.glob on big/network trees
+    since no Path objects or extra stat() calls are made per entry.
+    If dir_mtimes is given, it is filled with {directory: st_mtime_ns} for every directory visited.
+    Directories that can't be read (missing, no permission) are skipped with a warning, like Path.glob skips them.
+    """
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            if dir_mtimes is not None:
+                dir_mtimes[d] = os.stat(d).st_mtime_ns
+            it = os.scandir(d)
+        except OSError as err:
+            print(f"Warning: Could not read directory '{d}'. Reason: {err}")
+            continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    # Skipped directories are never opened at all
+                    if e.name not in SKIP_DIRS:
+                        stack.append(e.path)
+                elif e.name.endswith('.pdbqt'):
+                    yield e.name, e.path
+
+def _index_cache_path(source_dir: Path):
+    cache_key = hashlib.sha1(str(source_dir.resolve()).encode()).hexdigest()
+    return INDEX_CACHE_DIR / f"{cache_key}.pkl"
+
+def _load_cached_index(cache_path: Path):
+    """
+    Returns the saved file index if no directory in the tree has changed since it was saved, else None.
+    Adding or removing a file changes its directory's mtime, so one stat() per directory
+    is enough to validate the index without listing any directory again.
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        for d, mtime in cached['dirs'].items():
+            if os.stat(d).st_mtime_ns != mtime:
+                return None
+        return cached['index']
+    except Exception:
+        # Missing, unreadable, or out-of-date cache: just rescan
+        return None
+
+def create_file_index(source_dir: Path, use_cache: bool = True):
     """
     Performs a one-time scan of the source directory to create a fast lookup
-    index of all PDBQT files.
+    index of all PDBQT files. The index is saved to disk and reused on later
+    runs as long as the directory tree hasn't changed.
     
     Returns:
-        A dictionary mapping filename (str) to its full Path object.
+        A dictionary mapping filename (str) to its full path (str).
     """
-    print("Pre-scanning results directory to build a file index (this may take a moment)...")
     start_time = time.time()
+    cache_path = _index_cache_path(source_dir)
+
+    if use_cache:
+        file_index = _load_cached_index(cache_path)
+        if file_index is not None:
+            print(f"Loaded saved file index ({len(file_index)} files) in {time.time() - start_time:.2f} seconds.\n")
+            return file_index
+
+    print("Pre-scanning results directory to build a file index (this may take a moment)...")
     
-    # The key is the filename, the value is the full path object
-    file_index = {p.name: p for p in source_dir.glob("**/*.pdbqt")}
+    # The key is the filename, the value is the full path string
+    dir_mtimes = {}
+    # Absolute paths, so a saved index still works when run from another directory
+    file_index = dict(_scan(str(source_dir.resolve()), dir_mtimes))
     
     end_time = time.time()
     print(f"Indexing complete. Found {len(file_index)} files in {end_time - start_time:.2f} seconds.\n")
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            pickle.dump({'dirs': dir_mtimes, 'index': file_index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"Warning: Could not save the file index to '{cache_path}'. Reason: {e}")
     
     # 11/6/2025
     print(f"First five files of file_index:")
@@ -29,10 +114,65 @@ def create_file_index(source_dir: Path):
     
     return file_index
 
-def collect_docking_hits(results_file: Path, source_results_dir: Path, output_dir: Path, file_index: dict, top_n: int = None, score_range: list = None):
+# Errors from os.link that mean hard links can't be made here (other filesystem, or no link support)
+_NO_LINK_ERRNOS = frozenset(e for e in (errno.EXDEV, errno.EPERM, getattr(errno, 'ENOTSUP', None), getattr(errno, 'EOPNOTSUPP', None)) if e is not None)
+
+def _link_or_copy(src, dst):
+    """
+    Hard-links src to dst (no data is moved), falling back to a copy across filesystems.
+    A dst that is already a link to src is left as it is, so re-running into the same folder works;
+    any other existing dst (e.g. an earlier plain copy) is replaced by the link.
+    """
+    try:
+        if os.path.samefile(src, dst):
+            return
+    except FileNotFoundError:
+        pass
+    # Linked under a temp name and renamed over dst, so an existing dst is replaced in one step.
+    # The name is unique to this process and thread, so concurrent calls never share one
+    tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.link_tmp"
+    try:
+        os.link(src, tmp)
+    except OSError as e:
+        if e.errno not in _NO_LINK_ERRNOS:
+            raise
+        shutil.copyfile(src, dst)
+        return
+    try:
+        os.replace(tmp, dst)
+    except OSError:
+        os.remove(tmp)
+        raise
+
+def _iter_valid(f):
+    """Yields the lines of a results file, skipping comments and blank lines."""
+    for line in f:
+        if line.startswith("#") or not line.strip(): continue
+        yield line
+
+def find_by_prefix(model_name, prefix_index, sorted_prefixes):
+    """
+    Returns the path of the first result whose filename prefix starts with model_name
+    (e.g. 'AAEAMN' matches 'AAEAMN_model0'), or None if there is no such result.
+    Uses a binary search over the sorted prefixes, so each lookup is O(log N).
+    """
+    i = bisect.bisect_left(sorted_prefixes, model_name)
+    first = i
+    # Matches sit next to each other in sorted order, so only the few real candidates are checked.
+    # Prefer one where model_name is a whole name part ('AB' -> 'AB_model0' rather than 'ABC_model0').
+    while i < len(sorted_prefixes) and sorted_prefixes[i].startswith(model_name):
+        if sorted_prefixes[i][len(model_name):len(model_name) + 1] in ('', '_'):
+            return prefix_index[sorted_prefixes[i]]
+        i += 1
+    if i > first:
+        return prefix_index[sorted_prefixes[first]]
+    return None
+
+def collect_docking_hits(results_file: Path, source_results_dir: Path, output_dir: Path, file_index: dict, top_n: int = None, score_range: list = None, link: bool = False):
     """
     Reads a ranked results file and copies the corresponding docked PDBQT files
     using the pre-built file index for high performance.
+    With link=True, hard links are made instead of copies where possible.
     """
     # --- 1. Validation and Setup ---
     if not results_file.is_file():
@@ -40,10 +180,10 @@ def collect_docking_hits(results_file: Path, source_results_dir: Path, output_di
         sys.exit(1)
 
     # --- 2. Extract Protein Name ---
-    protein_name_match = re.search(r'top_dockers_(.+?)(?:\.txt|$)', results_file.name)
+    protein_name_match = _PROTEIN_RE.search(results_file.name)
     if not protein_name_match:
         # Fallback for RMS files or other formats
-        protein_name_match = re.search(r'_(PYR1_3K3K_DOCK|PYL2_3KDI_DOCK|1stp_DOCK)', results_file.name)
+        protein_name_match = _FALLBACK_RE.search(results_file.name)
     
     if not protein_name_match:
         protein_name = input(f"Could not automatically determine protein name from '{results_file.name}'. Please enter the target protein name (e.g., PYR1_3K3K_DOCK): ")
@@ -58,25 +198,23 @@ def collect_docking_hits(results_file: Path, source_results_dir: Path, output_di
     output_dir.mkdir(parents=True, exist_ok=True)
     print(f"Output directory: '{output_dir}'")
 
-    with open(results_file, 'r') as f:
-        lines = f.readlines()
-
     # --- 4. Filter Lines ---
-    lines_to_process = []
-    if score_range:
-        min_score, max_score = score_range
-        print(f"\nFiltering for ligands with scores between {min_score} and {max_score}...")
-        for line in lines:
-            if line.startswith("#") or not line.strip(): continue
-            try:
-                score = float(line.split()[0])
-                if min_score <= score <= max_score:
-                    lines_to_process.append(line)
-            except (ValueError, IndexError): continue
-    else: # Default to top_n
-        print(f"\nSelecting the top {top_n} ligands from '{results_file.name}'...")
-        valid_lines = [line for line in lines if not line.startswith("#") and line.strip()]
-        lines_to_process = valid_lines[:top_n]
+    # The file is streamed, so only the lines we keep are ever held in memory
+    with open(results_file, 'r') as f:
+        if score_range:
+            min_score, max_score = score_range
+            print(f"\nFiltering for ligands with scores between {min_score} and {max_score}...")
+            lines_to_process = []
+            for line in _iter_valid(f):
+                try:
+                    score = float(line.split()[0])
+                    if min_score <= score <= max_score:
+                        lines_to_process.append(line)
+                except (ValueError, IndexError): continue
+        else: # Default to top_n
+            print(f"\nSelecting the top {top_n} ligands from '{results_file.name}'...")
+            # Stops reading as soon as top_n lines have been found
+            lines_to_process = list(itertools.islice(_iter_valid(f), top_n))
 
     print(f"Found {len(lines_to_process)} docked poses matching criteria.")
     if not lines_to_process: return
@@ -86,6 +224,21 @@ def collect_docking_hits(results_file: Path, source_results_dir: Path, output_di
     failed_to_find = []
     print("\nStarting file collection using the index...")
 
+    # Index this protein's results by the part of the filename before "_vs_<protein>.pdbqt",
+    # so the fallback lookup below is a binary search instead of a scan of every file.
+    suffix = f"_vs_{protein_name}.pdbqt"
+    prefix_index = {fn[:-len(suffix)]: fp for fn, fp in file_index.items() if fn.endswith(suffix)}
+    sorted_prefixes = sorted(prefix_index)
+
+    # Every pose of a ligand, keyed by the bare ligand name (e.g. 'AAEAMN' -> AAEAMN_model0, AAEAMN_model1, ...),
+    # so the common fallback is a single dict lookup that still knows about all the matches
+    model_to_paths = defaultdict(list)
+    for prefix in sorted_prefixes:
+        stem, sep, _ = prefix.partition('_model')
+        if sep:
+            model_to_paths[stem].append(prefix_index[prefix])
+
+    pairs = []
     for i, line in enumerate(lines_to_process):
         sys.stdout.write(f"\rProcessing ligand {i+1}/{len(lines_to_process)}...")
         sys.stdout.flush()
@@ -96,35 +249,57 @@ def collect_docking_hits(results_file: Path, source_results_dir: Path, output_di
         
         # --- NEW, EFFICIENT LOOKUP LOGIC ---
         # Construct the expected filename and look for it in our pre-built index.
-        expected_filename = f"{model_name}_vs_{protein_name}.pdbqt"
+        expected_filename = model_name + suffix
         source_file_path = file_index.get(expected_filename)
 
         # Fallback for names with extra text (e.g., _model0)
         if not source_file_path:
-            for fname, fpath in file_index.items():
-                if fname.startswith(model_name) and fname.endswith(f"_vs_{protein_name}.pdbqt"):
-                    source_file_path = fpath
-                    break
+            candidates = model_to_paths.get(model_name)
+            if candidates:
+                source_file_path = candidates[0]
+            else:
+                source_file_path = find_by_prefix(model_name, prefix_index, sorted_prefixes)
         # --- END OF NEW LOGIC ---
 
         if source_file_path:
-            try:
-                shutil.copy(source_file_path, output_dir)
-                copied_count += 1
-            except Exception as e:
-                print(f"\nERROR: Could not copy {source_file_path}. Reason: {e}")
+            # Copies are done together after the lookup loop
+            pairs.append((source_file_path, os.path.join(output_dir, os.path.basename(source_file_path))))
         else:
             print("Failed to find a molecule:")
             print(f"Name: {model_name}")
-            print(f"File index: {file_index}")
+            # Only a sample: the full index can hold tens of thousands of entries
+            print(f"File index size: {len(file_index)}, sample: {list(itertools.islice(file_index, 5))}")
             print(f"Expected filename: {expected_filename}")
             print(f"Source file path: {source_file_path}")
             print(f"Output directory: {output_dir}")
             print("Remember, you put in the WHOLE suffix, i.e. KCNH2_7CNOB_DOCK, not just what you want it to be. " \
             "The program is looking for files with the name you type in, so make sure it matches.")
+            # Keep going; every miss is listed in the final report
             failed_to_find.append(model_name)
-            break
             
+    # Copies are I/O-bound, so threads overlap them fine despite the GIL
+    if pairs:
+        # One transfer per destination, so no two threads ever write the same file. As with copying
+        # one by one, the last source for a destination wins, and every line that went there is counted
+        sources = {}
+        line_counts = defaultdict(int)
+        for src, dst in pairs:
+            sources[dst] = src
+            line_counts[dst] += 1
+        transfer = _link_or_copy if link else shutil.copyfile
+        def _transfer(dst):
+            try:
+                transfer(sources[dst], dst)
+                return None
+            except Exception as e:
+                return f"\nERROR: Could not copy {sources[dst]}. Reason: {e}"
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            for dst, error in zip(sources, ex.map(_transfer, sources)):
+                if error:
+                    print(error)
+                else:
+                    copied_count += line_counts[dst]
+
     # --- 6. Final Report ---
     print(f"\n\nProcess complete. Successfully copied {copied_count} of {len(lines_to_process)} files to '{output_dir}'.")
     if failed_to_find:
@@ -160,6 +335,19 @@ def main():
         help="The source directory of your final docked ligand results (default: 'dock/results/docked_ligands')."
     )
 
+    parser.add_argument(
+        '--rebuild_index',
+        action='store_true',
+        help="Ignore the saved file index and rescan the source directory."
+    )
+
+    parser.add_argument(
+        '--link',
+        action='store_true',
+        help="Hard-link the files into the output directory instead of copying them (instant, no extra disk space).\n"
+             "Note: editing a linked file also edits the original result."
+    )
+
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument(
         '-n', '--number', 
@@ -175,9 +363,14 @@ def main():
     )
     
     args = parser.parse_args()
+
+    source_dir = Path(args.source_dir)
+    if not source_dir.is_dir():
+        print(f"Error: Source directory not found at '{source_dir}'")
+        sys.exit(1)
     
     # Create the file index once
-    file_index = create_file_index(Path(args.source_dir))
+    file_index = create_file_index(Path(args.source_dir), use_cache=not args.rebuild_index)
     
     collect_docking_hits(
         results_file=Path(args.results_file),
@@ -185,7 +378,8 @@ def main():
         output_dir=Path(args.output_dir),
         file_index=file_index,
         top_n=args.number,
-        score_range=args.score_range
+        score_range=args.score_range,
+        link=args.link
     )
 
 if __name__ == "__main__":
@@ -1,12 +1,22 @@
 import os
+import errno
 import shutil
 import subprocess
 import math
+import atexit
+import mmap
+import re
 import time
 import signal
+import threading
+import tempfile
+import functools
+import bisect
 from pathlib import Path
-from time import sleep
-from collections import deque
+from collections import deque, namedtuple
+from itertools import islice
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import statistics
 
 # Directory paths
@@ -18,11 +28,19 @@ CACHE_DIR = BASE_DIR / "cache"
 RESULTS_DIR = BASE_DIR / "results"
 COMPARISON_LIGAND_DIR = BASE_DIR / "comparison_ligands"
 
+# Precomputed Vina grid maps, one set per protein
+MAPS_DIR = CACHE_DIR / "maps"
+
 # Cache files
 LIGAND_NAMES = CACHE_DIR / "ligandNames.txt"
 PROTEIN_NAMES = CACHE_DIR / "proteinNames.txt"
 PROGRESS_CACHE = CACHE_DIR / "progress_cache.txt"
+
+# Seconds between writes of the progress cache while docking (loop boundaries and Ctrl-C always write it)
+PROGRESS_FLUSH_INTERVAL = 2.0
 COMPARISON_LIGAND_NAMES = CACHE_DIR / "comparisonLigandNames.txt"
+# Written into a models_<ligand> folder once its models are extracted; lists the model file names
+MODELS_DONE = ".done"
 
 # Ensure necessary directories exist
 for directory in [PROTEIN_DIR, LIGAND_DIR, CONFIG_DIR, CACHE_DIR, RESULTS_DIR, COMPARISON_LIGAND_DIR]:
@@ -35,7 +53,24 @@ if DEBUG:
     print("Debug mode enabled.")
 
 # Global variable to track if display_progress is rendering
-IS_RENDERING = False
+# (cleared while a progress display is being drawn, set again when it's done; waiting on it needs no polling)
+RENDER_DONE = threading.Event()
+RENDER_DONE.set()
+
+def renders(method):
+    """
+    Marks a DisplayManager method as a render: RENDER_DONE is cleared while it runs,
+    and the frame is flushed to the terminal once at the end rather than bar by bar.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        RENDER_DONE.clear()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            print(end="", flush=True)
+            RENDER_DONE.set()
+    return wrapper
 
 # Global variable to track the start time of the docking process
 START_TIME = time.time()
@@ -46,7 +81,282 @@ TASK_DURATIONS = deque(maxlen=30)  # Store durations for the last 30 tasks
 # Global variable to track failed docking attempts
 FAILED_DOCKINGS = []
 
+# AutoDock types of hydrogens, which the pre-screen's heavy-atom count leaves out
+HYDROGEN_TYPES = frozenset((b"H", b"HD", b"HS"))
+
+# Score lines not yet appended to their scores_<protein>.txt, by scores file
+SCORE_BUFFERS = {}
+
+# How many scores a scores file collects in memory before they are written and the file is re-sorted
+SCORE_FLUSH_THRESHOLD = 32
+
+# Most ligands one Vina process docks with --batch. Each batch is a fresh Vina process, so a long screen
+# never depends on one process staying healthy (and keeping its memory in check) for thousands of ligands.
+MAX_BATCH_SIZE = 50
+
+# Progress bar colors (ANSI background colors). Each run of same-colored cells is one colored span of spaces,
+# rather than a color code around every single cell
+BAR_GREEN = "\033[42m"
+BAR_RED = "\033[41m"
+BAR_BLUE = "\033[44m"
+BAR_RESET = "\033[0m"
+
+# Terminal size, looked up once and refreshed on SIGWINCH (window resized) instead of on every redraw
+TERMINAL_SIZE = shutil.get_terminal_size((80, 20))
+
+def refresh_terminal_size(signal_received=None, frame=None):
+    global TERMINAL_SIZE
+    TERMINAL_SIZE = shutil.get_terminal_size((80, 20))
+
 CONFIG_PATH = CONFIG_DIR / "config.txt"
+
+def is_enabled(value):
+    """True for yes/on-style config values ("true", "yes", "1", "on")."""
+    return str(value).strip().lower() in ("true", "yes", "1", "on")
+
+def available_cpus():
+    """
+    The number of CPUs this process may run on. Under taskset, cgroups cpusets or a container's
+    CPU limit that can be fewer than os.cpu_count(), which counts every CPU in the machine.
+    """
+    if hasattr(os, "sched_getaffinity"):  # Linux-only
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def worker_count(value):
+    """The workers config value as a number of processes: "auto" means one per available CPU core, blank means 1."""
+    value = str(value or "").strip().lower()
+    if value == "auto":
+        return available_cpus()
+    return int(value or 1)
+
+def vina_timeout(settings):
+    """The optional vina_timeout config value (seconds per ligand) as a float, or None for no limit."""
+    value = str(settings.get("vina_timeout") or "").strip()
+    return float(value) if value else None
+
+def numa_nodes():
+    """Maps each CPU to its NUMA node, from /sys/devices/system/node. Empty where that isn't available."""
+    node_of = {}
+    for node_dir in Path("/sys/devices/system/node").glob("node[0-9]*"):
+        try:
+            cpulist = (node_dir / "cpulist").read_text().strip()
+        except OSError:
+            continue
+        node = int(node_dir.name[4:])
+        for part in filter(None, cpulist.split(",")):
+            first, _, last = part.partition("-")
+            for cpu in range(int(first), int(last or first) + 1):
+                node_of[cpu] = node
+    return node_of
+
+def worker_core_sets(workers):
+    """
+    Splits the CPUs this process may use into `workers` equal, disjoint sets, taking them in NUMA node order
+    so a worker's set only spans two nodes when the split doesn't line up with them.
+    Returns [] when there are fewer CPUs than workers or CPU affinity isn't supported (it's Linux-only).
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return []
+    cpus = os.sched_getaffinity(0)
+    if len(cpus) < workers:
+        return []
+    node_of = numa_nodes()
+    ordered = sorted(cpus, key=lambda cpu: (node_of.get(cpu, 0), cpu))
+    per_worker = len(ordered) // workers
+    return [set(ordered[i * per_worker:(i + 1) * per_worker]) for i in range(workers)]
+
+def _pin_worker_thread(core_sets):
+    # sched_setaffinity(0) sets the calling thread's CPUs, and every Vina process this worker starts inherits them
+    try:
+        os.sched_setaffinity(0, core_sets.popleft())
+    except (IndexError, OSError):
+        pass
+
+def has_models(f):
+    """
+    True if the open (binary) ligand file contains "MODEL" anywhere, i.e. it holds several models.
+    The file is memory-mapped and searched in place instead of being read into a string.
+    """
+    if os.fstat(f.fileno()).st_size == 0:
+        return False  # mmap can't map an empty file
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm.find(b"MODEL") != -1
+
+# Mode 1 row of Vina's result table: the pose number, then the affinity
+VINA_SCORE_RE = re.compile(rb"^[ \t]*1[ \t]+(-?\d+\.\d+)", re.MULTILINE)
+
+def read_vina_score(log_file):
+    """
+    Returns the best pose's affinity (as written) from a Vina log, or None if the log has no result table.
+    The log is memory-mapped and searched with one regex instead of being read line by line.
+    """
+    with open(log_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None  # mmap can't map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            match = VINA_SCORE_RE.search(mm)
+            return match.group(1).decode() if match else None
+
+# Folders already created by ensure_dir during this run
+MADE_DIRS = set()
+
+def ensure_dir(path):
+    """mkdir -p, but only the first time a folder is asked for, so per-task calls don't each cost a syscall."""
+    if path not in MADE_DIRS:
+        path.mkdir(parents=True, exist_ok=True)
+        MADE_DIRS.add(path)
+
+def move_file(src, dst):
+    """
+    Moves a file with a single os.replace (a rename, overwriting dst like shutil.move does).
+    Falls back to shutil.move only when src and dst are on different filesystems.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), dst)
+
+# A parsed scores_<protein>.txt, kept as parallel lists: the original lines, the ligand names and the scores as floats.
+# other_lines holds any non-comment lines that don't start with a score, so rewriting the file never loses them
+ScoreTable = namedtuple("ScoreTable", ["lines", "names", "scores", "other_lines"], defaults=[()])
+
+# Parsed scores files by path, each with the (mtime, size) it was read at, so an unchanged file is only parsed once
+SCORE_TABLES = {}
+
+def load_scores(scores_file):
+    """
+    Returns the ScoreTable for a scores file (empty if the file doesn't exist).
+    A score line is "<score> <ligand>", the ligand being the rest of the line (a name may contain spaces).
+    Comment and blank lines are left out; other lines that don't start with a number go in other_lines.
+    """
+    try:
+        st = os.stat(scores_file)
+    except FileNotFoundError:
+        return ScoreTable([], [], [])
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = SCORE_TABLES.get(str(scores_file))
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    lines, names, scores, other_lines = [], [], [], []
+    # One read and one split for the whole file, instead of a buffered read every few KB
+    with open(scores_file, "r") as f:
+        chunks = f.read().split("\n")
+    for chunk in chunks:
+        if chunk.startswith("#") or not chunk.strip():
+            continue
+        # Kept lines get their newline back (a final line without one gets one too, as it may not stay last once sorted)
+        line = chunk + "\n"
+        parts = chunk.split(None, 1)
+        try:
+            score = float(parts[0])
+        except ValueError:
+            other_lines.append(line)
+            continue
+        lines.append(line)
+        names.append(parts[1].strip() if len(parts) == 2 else "")
+        scores.append(score)
+    table = ScoreTable(lines, names, scores, other_lines)
+    SCORE_TABLES[str(scores_file)] = (stamp, table)
+    return table
+
+# Score lines of each scores file joined into one string, by path, kept with the ScoreTable they came from
+SCORE_TEXTS = {}
+
+def scores_text(scores_file):
+    """All the score lines of a scores file as one string, for find_score. Rebuilt only when the file changes."""
+    table = load_scores(scores_file)
+    cached = SCORE_TEXTS.get(str(scores_file))
+    if cached is None or cached[0] is not table:
+        cached = (table, "".join(table.lines))
+        SCORE_TEXTS[str(scores_file)] = cached
+    return cached[1]
+
+def find_score(text, name):
+    """
+    Returns the score (as written) on the first line of a scores_text() string that contains name, or None.
+    Same match as reading the file line by line and checking `name in line`, but it's one str.find.
+    """
+    at = text.find(name)
+    if at < 0:
+        return None
+    line_start = text.rfind("\n", 0, at) + 1
+    line_end = text.find("\n", at)
+    return text[line_start:line_end if line_end >= 0 else len(text)].split()[0]
+
+# A ranked results file (RMS or per-protein differences): its non-blank lines, stripped, joined by newlines,
+# and where each line starts in that text
+RankedLines = namedtuple("RankedLines", ["lines", "text", "starts"])
+
+# Ranked files by path, each with the (mtime, size) it was read at, like SCORE_TABLES
+RANKED_FILES = {}
+
+# Threads reading the ranked files before the ligand summaries are written
+RANKED_READ_THREADS = 16
+
+def load_ranked_lines(ranked_file):
+    """
+    Returns the RankedLines of a file (None if it doesn't exist), reading it only if it changed since the last call.
+    "#" header lines aren't ranks, so they're left out (rank 1 is the first ligand, the total is the number of ligands).
+    """
+    try:
+        st = os.stat(ranked_file)
+    except FileNotFoundError:
+        return None
+    key = str(ranked_file)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = RANKED_FILES.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(ranked_file) as f:
+        lines = [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+    starts = []
+    offset = 0
+    for line in lines:
+        starts.append(offset)
+        offset += len(line) + 1
+    ranked = RankedLines(lines, "\n".join(lines), starts)
+    RANKED_FILES[key] = (stamp, ranked)
+    return ranked
+
+def find_ranked(ranked, name):
+    """
+    Returns (rank, line) for the first line of a RankedLines that contains name, or None.
+    Same as going through the lines checking `name in line`, but it's one str.find and a bisect.
+    """
+    at = ranked.text.find(name)
+    if at < 0:
+        return None
+    index = bisect.bisect_right(ranked.starts, at) - 1
+    return index + 1, ranked.lines[index]
+
+def remember_scores(scores_file, table):
+    """Caches a table for a scores file that was just written from it, so it isn't parsed again."""
+    st = os.stat(scores_file)
+    SCORE_TABLES[str(scores_file)] = ((st.st_mtime_ns, st.st_size), table)
+
+def iter_files(directory, suffix=""):
+    """
+    Yields the files directly in a directory whose names end with suffix, in one os.scandir pass
+    (the file type comes from the directory entry, so there is no extra stat() per file).
+    Like glob("*"), hidden files are skipped. Paths are strings; a missing directory yields nothing.
+    """
+    try:
+        it = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with it:
+        for e in it:
+            if e.name.endswith(suffix) and not e.name.startswith(".") and e.is_file():
+                yield e.path
+
+def list_files(directory, suffix=""):
+    """Same as iter_files, but returns the paths as a list ([] if the directory doesn't exist)."""
+    return list(iter_files(directory, suffix))
+
 class ConfigManager:
     def __init__(self, config_dir, results_dir, ligand_dir, protein_dir, comparison_ligand_dir):
         self.config_path = config_dir / "config.txt"
@@ -68,25 +378,41 @@ class ConfigManager:
                 f.write("energy_range = 3\n")
                 f.write("\n# Number of binding modes to generate\n")
                 f.write("num_modes = 9\n")
+                f.write("\n# Number of Vina jobs to run at the same time (the cpu setting is split between them; auto = one per CPU core)\n")
+                f.write("workers = 1\n")
+                f.write("\n# Number of ligands docked per Vina run with vina --batch (needs Vina 1.2+; auto = as many as fit)\n")
+                f.write("batch_size = 1\n")
+                f.write("\n# Write each protein's grid maps once and reuse them for every ligand (needs Vina 1.2+)\n")
+                f.write("use_maps = no\n")
+                f.write("\n# Pin each worker's Vina jobs to their own CPU cores, grouped by NUMA node (Linux only)\n")
+                f.write("pin_cpus = no\n")
+                f.write("\n# Skip models with more heavy atoms or torsions than this before docking (blank = no limit)\n")
+                f.write("max_heavy_atoms = \n")
+                f.write("max_torsions = \n")
+                f.write("\n# Stop a Vina run that takes longer than this many seconds per ligand (blank = no limit)\n")
+                f.write("vina_timeout = \n")
 
     def initialize_cache(self, mode=None):
         if mode == "clear":
             backup_dir = self.cache_dir / "cache_backup"
             backup_dir.mkdir(parents=True, exist_ok=True)
-            for item in self.cache_dir.iterdir():
-                if item == backup_dir:
-                    continue
-                destination = backup_dir / item.name
-                if destination.exists():
+            # Names already in the backup folder, read once; free names are then found in memory
+            with os.scandir(backup_dir) as it:
+                existing = {e.name for e in it}
+            # Names and paths straight from the directory entries; a Path is only split up on a name clash
+            with os.scandir(self.cache_dir) as it:
+                items = [(e.name, e.path) for e in it if e.name != backup_dir.name]
+            for name, path in items:
+                if name in existing:
+                    stem, suffix = os.path.splitext(name)
                     counter = 1
-                    new_name = f"{item.stem}_copy{counter}{item.suffix}"
-                    new_destination = backup_dir / new_name
-                    while new_destination.exists():
+                    name = f"{stem}_copy{counter}{suffix}"
+                    while name in existing:
                         counter += 1
-                        new_name = f"{item.stem}_copy{counter}{item.suffix}"
-                        new_destination = backup_dir / new_name
-                    destination = new_destination
-                shutil.move(str(item), str(destination))
+                        name = f"{stem}_copy{counter}{suffix}"
+                existing.add(name)
+                # Same filesystem, so this is a single rename
+                os.replace(path, backup_dir / name)
             print("Cache cleared and backed up.")
         elif mode == "clear-everything":
             shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -104,23 +430,23 @@ class ConfigManager:
         comparison_ligand_names = self.cache_dir / "comparisonLigandNames.txt"
         progress_cache = self.cache_dir / "progress_cache.txt"
 
-        if not list(self.ligand_dir.glob("*.pdbqt")):
+        ligand_files = list_files(self.ligand_dir, ".pdbqt")
+        if not ligand_files:
             print(f"Error: No ligand files found in {self.ligand_dir}")
             exit(1)
-        with open(ligand_names, "w") as f:
-            f.writelines([str(file) + "\n" for file in self.ligand_dir.glob("*.pdbqt")])
+        ligand_names.write_text("\n".join(ligand_files) + "\n")
 
-        if not list(self.protein_dir.glob("*.pdbqt")):
+        protein_files = list_files(self.protein_dir, ".pdbqt")
+        if not protein_files:
             print(f"Error: No protein files found in {self.protein_dir}")
             exit(1)
-        with open(protein_names, "w") as f:
-            f.writelines([str(file) + "\n" for file in self.protein_dir.glob("*.pdbqt")])
+        protein_names.write_text("\n".join(protein_files) + "\n")
 
-        if not list(self.comparison_ligand_dir.glob("*.pdbqt")):
+        comparison_ligand_files = list_files(self.comparison_ligand_dir, ".pdbqt")
+        if not comparison_ligand_files:
             print(f"Error: No comparison ligand files found in {self.comparison_ligand_dir}")
             exit(1)
-        with open(comparison_ligand_names, "w") as f:
-            f.writelines([str(file) + "\n" for file in self.comparison_ligand_dir.glob("*.pdbqt")])
+        comparison_ligand_names.write_text("\n".join(comparison_ligand_files) + "\n")
 
         if not progress_cache.exists():
             with open(progress_cache, "w") as f:
@@ -136,46 +462,55 @@ class RMSCalculator:
     def calculate_rms_relative_to_comparison(score, comparison_scores):
         if not comparison_scores:
             return float("inf")
-        squared_differences = [(float(score) - float(c_score)) ** 2 for c_score in comparison_scores]
-        return math.sqrt(sum(squared_differences) / len(squared_differences))
+        # math.hypot squares, sums and roots the differences in C: sqrt(sum(d*d)) / sqrt(n) is the RMS
+        score = float(score)
+        return math.hypot(*[score - float(c_score) for c_score in comparison_scores]) / math.sqrt(len(comparison_scores))
 
 class DockingProgressMonitor:
     def __init__(self, display_manager):
         self.display_manager = display_manager
 
-    def monitor(self, log_file):
+    def monitor(self, stream, log):
         """
-        Monitor the docking progress by reading the log file and updating a text-based progress bar.
-        :param log_file: Path to the log file being monitored.
+        Monitor the docking progress by reading Vina's output straight from its pipe and updating a text-based progress bar.
+        Output is copied to the log as it arrives, so the log file is never re-read.
+        :param stream: Vina's stdout pipe (binary, stderr merged into it).
+        :param log: Binary file object the output is copied to.
         """
-        console_width = shutil.get_terminal_size((80, 20)).columns  # Get terminal width
-        progress_bar_length = console_width - 30  # Adjust progress bar length
-        progress = 0
-
-        # Wait for the log file to be created
-        while not Path(log_file).exists():
-            time.sleep(0.2)  # Check every 0.2 seconds
+        stars = 0
+        progress = -1
 
         dock_progress_row = 15  # Row for the progress bar
 
-        # Monitor the log file for progress updates
-        while progress < 100:
-            if Path(log_file).exists():
-                # Count the number of '*' characters in the log file to determine progress
-                with open(log_file, "r") as f:
-                    progress = f.read().count("*") * 2  # Each '*' represents 2% progress
-
-                # Ensure progress does not exceed 100%
-                progress = min(progress, 100)
-
-                # Update the progress bar
-                self.display_manager.move_cursor(dock_progress_row, 0)
-                print(f"\rCurrent docking progress: {progress}%   ", end="")
-                self.display_manager.draw_progress_bar(dock_progress_row + 1, 0, progress_bar_length, progress, 100)
-
-            time.sleep(0.2)  # Update display every 0.2 seconds
+        # The task's progress display may still be drawing on another thread
+        DisplayManager.wait_for_render_stop()
+
+        # Blocks until Vina writes something; an empty read means Vina has closed its output
+        fd = stream.fileno()
+        while True:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            log.write(chunk)
+            # Count the number of '*' characters as they arrive to determine progress
+            stars += chunk.count(b"*")
+            # Ensure progress does not exceed 100%
+            new_progress = min(stars * 2, 100)  # Each '*' represents 2% progress
+            if new_progress == progress:
+                continue
+            progress = new_progress
+
+            # A Vina run can take minutes, so the width is read again on each redraw (SIGWINCH keeps TERMINAL_SIZE current)
+            console_width = TERMINAL_SIZE.columns  # Get terminal width
+            progress_bar_length = console_width - 30  # Adjust progress bar length
+
+            # Update the progress bar
+            self.display_manager.move_cursor(dock_progress_row, 0)
+            print(f"\rCurrent docking progress: {progress}%   ", end="")
+            self.display_manager.draw_progress_bar(dock_progress_row + 1, 0, progress_bar_length, progress, 100)
 
         # Ensure the progress bar is fully green at the end
+        progress_bar_length = TERMINAL_SIZE.columns - 30
         self.display_manager.move_cursor(dock_progress_row, 0)
         print("\nCurrent docking progress: 100%")
         self.display_manager.draw_progress_bar(dock_progress_row + 1, 0, progress_bar_length, 100, 100)
@@ -202,6 +537,19 @@ class DockingConfig:
             f.write("energy_range = \n")
             f.write("\n# Number of binding modes to generate (e.g., 9)\n")
             f.write("num_modes = \n")
+            f.write("\n# Optional: number of Vina jobs to run at the same time (the cpu setting is split between them; auto = one per CPU core)\n")
+            f.write("workers = 1\n")
+            f.write("\n# Optional: number of ligands docked per Vina run with vina --batch (needs Vina 1.2+; auto = as many as fit)\n")
+            f.write("batch_size = 1\n")
+            f.write("\n# Optional: write each protein's grid maps once and reuse them for every ligand (needs Vina 1.2+)\n")
+            f.write("use_maps = no\n")
+            f.write("\n# Optional: pin each worker's Vina jobs to their own CPU cores, grouped by NUMA node (Linux only)\n")
+            f.write("pin_cpus = no\n")
+            f.write("\n# Optional: skip models with more heavy atoms or torsions than this before docking (blank = no limit)\n")
+            f.write("max_heavy_atoms = \n")
+            f.write("max_torsions = \n")
+            f.write("\n# Optional: stop a Vina run that takes longer than this many seconds per ligand (blank = no limit)\n")
+            f.write("vina_timeout = \n")
 
     def read_config(self, config_path):
         config = {}
@@ -241,6 +589,9 @@ class DockingConfig:
         print("Vina configuration loaded successfully:")
         for key in expected_keys:
             print(f"  {key}: {self.config[key]}")
+        for key in ["workers", "batch_size", "use_maps", "pin_cpus", "max_heavy_atoms", "max_torsions", "vina_timeout"]:
+            if self.config.get(key):
+                print(f"  {key}: {self.config[key]}")
 
 class ScoreManager:
     def __init__(self, results_dir):
@@ -250,30 +601,50 @@ class ScoreManager:
     def write_score(self, protein_name, ligand_name, score):
         # Write or append to scores_<protein_name>.txt
         scores_file = self.scores_dir / f"scores_{protein_name}.txt"
-        header = "# Score  Ligand\n"
-        if not scores_file.exists() or os.path.getsize(scores_file) == 0:
-            with open(scores_file, "w") as f:
-                f.write(header)
-        with open(scores_file, "a") as f:
-            f.write(f"{score} {ligand_name}\n")
-        self.update_sorted_scores(scores_file)
-        self.write_stats(scores_file)
-        self.write_scores_csv(scores_file)
+        self.buffer_score(scores_file, ligand_name, score)
+
+    def buffer_score(self, scores_file, ligand_name, score):
+        # Queue a score; the file is only appended to (and re-sorted) every SCORE_FLUSH_THRESHOLD scores
+        buffer = SCORE_BUFFERS.setdefault(scores_file, [])
+        buffer.append(f"{score} {ligand_name}\n")
+        if len(buffer) >= SCORE_FLUSH_THRESHOLD:
+            self.flush_scores(scores_file)
+
+    def flush_scores(self, scores_file=None):
+        """
+        Appends buffered scores to their scores file (every file if scores_file is None) in one write,
+        then re-sorts it and rewrites its stats and CSV once for the whole batch.
+        """
+        for path in ([scores_file] if scores_file is not None else list(SCORE_BUFFERS)):
+            lines = SCORE_BUFFERS.pop(path, None)
+            if not lines:
+                continue
+            header = "# Score  Ligand\n"
+            if not path.exists() or os.path.getsize(path) == 0:
+                with open(path, "w") as f:
+                    f.write(header)
+            with open(path, "a") as f:
+                f.write("".join(lines))
+            self.update_sorted_scores(path)
+            self.write_stats(path)
+            self.write_scores_csv(path)
 
     def update_sorted_scores(self, scores_file):
         # Sort and rewrite scores file
-        with open(scores_file, "r") as f:
-            lines = [line for line in f if not line.startswith("#")]
-        sorted_lines = sorted(lines, key=lambda x: float(x.split()[0]))
+        table = load_scores(scores_file)
+        order = sorted(range(len(table.scores)), key=table.scores.__getitem__)
+        sorted_table = ScoreTable([table.lines[i] for i in order], [table.names[i] for i in order], [table.scores[i] for i in order], table.other_lines)
         with open(scores_file, "w") as f:
             write_header(f, "Docking scores for all ligands against this protein.", columns=["Score", "Ligand"])
-            for line in sorted_lines:
-                f.write(line)
+            f.write("".join(sorted_table.lines))
+            # Lines that aren't scores can't be sorted, but they're kept, after the scores, as they were
+            f.write("".join(table.other_lines))
+        # write_stats and write_scores_csv run right after this, so they get the sorted table without re-reading the file
+        remember_scores(scores_file, sorted_table)
 
     def write_stats(self, scores_file):
         # Write statistics file
-        with open(scores_file) as f:
-            scores = [float(line.split()[0]) for line in f if not line.startswith("#")]
+        scores = load_scores(scores_file).scores
         if scores:
             mean = statistics.mean(scores)
             median = statistics.median(scores)
@@ -284,12 +655,11 @@ class ScoreManager:
 
     def write_scores_csv(self, scores_file):
         csv_file = scores_file.with_suffix('.csv')
-        with open(scores_file) as fin, open(csv_file, "w") as fout:
+        table = load_scores(scores_file)
+        with open(csv_file, "w") as fout:
             write_header(fout, "CSV version of docking scores for this protein.", columns=["Score", "Ligand"])
             fout.write("Score,Ligand\n")
-            for line in fin:
-                if line.startswith("#"): continue
-                fout.write(",".join(line.strip().split()) + "\n")
+            fout.write("".join(",".join(line.split()) + "\n" for line in table.lines))
 
     def write_ligand_stats(self, ligand_file, proteins):
         # Write per-ligand stats
@@ -298,13 +668,10 @@ class ScoreManager:
         for protein_file in proteins:
             protein_name = Path(protein_file).stem
             scores_file = self.scores_dir / f"scores_{protein_name}.txt"
-            if scores_file.exists():
-                with open(scores_file) as f:
-                    for line in f:
-                        if line.startswith("#"): continue
-                        if ligand_name in line:
-                            scores.append(float(line.split()[0]))
-                            break
+            # Each file is parsed once (load_scores caches it) instead of re-read for every ligand
+            score = find_score(scores_text(scores_file), ligand_name)
+            if score is not None:
+                scores.append(float(score))
         if scores:
             mean = statistics.mean(scores)
             median = statistics.median(scores)
@@ -326,14 +693,7 @@ class ScoreManager:
                 for protein_file in proteins:
                     protein_name = Path(protein_file).stem
                     scores_file = self.scores_dir / f"scores_{protein_name}.txt"
-                    score = None
-                    if scores_file.exists():
-                        with open(scores_file) as sf:
-                            for line in sf:
-                                if line.startswith("#"): continue
-                                if ligand_name in line:
-                                    score = line.split()[0]
-                                    break
+                    score = find_score(scores_text(scores_file), ligand_name)
                     if score is not None:
                         f.write(f"{score} {protein_name}\n")
 
@@ -349,14 +709,7 @@ class ScoreManager:
                 for protein_file in proteins:
                     protein_name = Path(protein_file).stem
                     scores_file = self.scores_dir / f"scores_{protein_name}.txt"
-                    score = None
-                    if scores_file.exists():
-                        with open(scores_file) as sf:
-                            for line in sf:
-                                if line.startswith("#"): continue
-                                if comp_lig_name in line:
-                                    score = line.split()[0]
-                                    break
+                    score = find_score(scores_text(scores_file), comp_lig_name)
                     if score is not None:
                         f.write(f"{score} {protein_name}\n")
 
@@ -382,24 +735,17 @@ class ScoreManager:
             for protein_file in proteins:
                 protein_name = Path(protein_file).stem
                 scores_file = SCORES_DIR / f"scores_{protein_name}.txt"
-                comp_score = None
                 if not scores_file.exists():
                     continue
-                with open(scores_file) as f:
-                    for line in f:
-                        if line.startswith("#"): continue
-                        if comp_lig_name in line:
-                            comp_score = float(line.split()[0])
-                            break
+                comp_score = find_score(scores_text(scores_file), comp_lig_name)
                 if comp_score is None:
                     continue
+                comp_score = float(comp_score)
                 diffs = []
-                with open(scores_file) as f:
-                    for line in f:
-                        if line.startswith("#"): continue
-                        score, lig_name = line.split()
-                        diff = float(score) - comp_score
-                        diffs.append((abs(diff), diff, lig_name))
+                table = load_scores(scores_file)
+                for score, lig_name in zip(table.scores, table.names):
+                    diff = score - comp_score
+                    diffs.append((abs(diff), diff, lig_name))
                 diffs.sort()
                 ranked_file = SCORES_DIR / f"scores_{comp_lig_name}_in_{protein_name}_ranked.txt"
                 with open(ranked_file, "w") as f:
@@ -451,41 +797,60 @@ class ScoreManager:
             f.write(env_info + "\n")
 
     def calculate_best_ligands(self, ligands, proteins, comparison_ligands):
+        """
+        Writes each model's RMS difference from the comparison ligands' scores to best_ligands.txt.
+        Returns the lines written, each with its RMS, so rank_and_display_best_ligands doesn't have to re-read the file.
+        """
         best_ligands_file = self.results_dir / "best_ligands.txt"
+        rows = []
+        # Each scores file is read once; everything below is dict lookups
+        protein_scores = [self.read_scores(self.scores_dir / f"scores_{Path(protein_file).stem}.txt") for protein_file in proteins]
+        comparison_names = [Path(comp_lig_file).stem for comp_lig_file in comparison_ligands]
+        comparison_scores = [[scores[name] for name in comparison_names if name in scores] for scores in protein_scores]
+        # Per protein: how many comparison scores, their mean, and their sum of squared deviations from it.
+        # sum((m - c)^2) = n * (m - mean)^2 + sum((c - mean)^2), so each model needs one step per protein
+        # instead of one per comparison ligand (and both terms are >= 0, so it doesn't lose precision)
+        comparison_stats = []
+        for comp_scores in comparison_scores:
+            count = len(comp_scores)
+            mean = math.fsum(comp_scores) / count if count else 0.0
+            comparison_stats.append((count, mean, math.fsum((c - mean) ** 2 for c in comp_scores)))
         with open(best_ligands_file, "w") as best_ligands:
             for ligand_file in ligands:
-                models = list((CACHE_DIR / f"models_{Path(ligand_file).stem}").glob("*.pdbqt"))
-                for model_file in models:
+                # Models are only needed one at a time here, so they are streamed from the folder
+                for model_file in iter_files(CACHE_DIR / f"models_{Path(ligand_file).stem}", ".pdbqt"):
                     model_name = Path(model_file).stem
-                    diffs = []
-                    for protein_file in proteins:
-                        protein_name = Path(protein_file).stem
-                        scores_file = self.scores_dir / f"scores_{protein_name}.txt"
-                        model_score = self.get_score(scores_file, model_name)
+                    # Running sum of squared differences and their count, instead of a list of differences
+                    sum_squares = 0.0
+                    count = 0
+                    for scores, (comp_count, comp_mean, comp_spread) in zip(protein_scores, comparison_stats):
+                        model_score = scores.get(model_name)
                         if model_score is None:
                             continue
-                        comp_scores = []
-                        for comp_lig_file in comparison_ligands:
-                            comp_lig_name = Path(comp_lig_file).stem
-                            comp_score = self.get_score(scores_file, comp_lig_name)
-                            if comp_score is not None:
-                                comp_scores.append(comp_score)
-                        for comp_score in comp_scores:
-                            diffs.append(model_score - comp_score)
-                    if diffs:
-                        rms = math.sqrt(sum(d**2 for d in diffs) / len(diffs))
-                        best_ligands.write(f"{rms:.8f} {model_name}\n")
-
-    def rank_and_display_best_ligands(self):
+                        sum_squares += comp_count * (model_score - comp_mean) ** 2 + comp_spread
+                        count += comp_count
+                    if count:
+                        rms_text = f"{math.sqrt(sum_squares / count):.8f}"
+                        line = f"{rms_text} {model_name}\n"
+                        best_ligands.write(line)
+                        # Ranked by the written value, as if it had been read back from the file
+                        rows.append((float(rms_text), line))
+        return rows
+
+    def rank_and_display_best_ligands(self, rows=None):
         """
         Rank the best ligands and display the top 5.
+        rows is what calculate_best_ligands returned; without it best_ligands.txt is read instead.
         """
         best_ligands_file = self.results_dir / "best_ligands.txt"
         ranked_best_ligands_file = self.results_dir / "ranked_best_ligands.txt"
 
-        if best_ligands_file.exists():
-            with open(best_ligands_file, "r") as f:
-                sorted_ligands = sorted(f.readlines(), key=lambda x: float(x.split()[0]))
+        if rows is not None or best_ligands_file.exists():
+            if rows is None:
+                with open(best_ligands_file, "r") as f:
+                    rows = [(float(line.split(None, 1)[0]), line) for line in f]
+            # Stable sort on the RMS alone, so ties keep their file order; itemgetter is a C key, no Python call per row
+            sorted_ligands = [line for _, line in sorted(rows, key=itemgetter(0))]
             with open(ranked_best_ligands_file, "w") as f:
                 f.writelines(sorted_ligands)
             print(f"Best ligands ranked and saved to {ranked_best_ligands_file}.")
@@ -504,51 +869,51 @@ class ScoreManager:
         for comp_lig_file in comparison_ligands:
             comp_lig_name = Path(comp_lig_file).stem
             rms_file = SCORES_DIR / f"scores_{comp_lig_name}_RMS.txt"
-            rms_scores = []
+            # Running sum of squared differences and number of proteins per ligand, added to protein by protein
+            sum_squares = {}
+            counts = {}
             for protein_file in proteins:
                 protein_name = Path(protein_file).stem
                 comp_scores_file = SCORES_DIR / f"scores_{protein_name}.txt"
-                comp_score = None
-                with open(comp_scores_file) as f:
-                    for line in f:
-                        if line.startswith("#"): continue
-                        if comp_lig_name in line:
-                            comp_score = float(line.split()[0])
-                            break
+                # Each protein's file is parsed once (load_scores caches it), not twice per comparison ligand
+                comp_score = find_score(scores_text(comp_scores_file), comp_lig_name)
                 if comp_score is None:
                     continue
+                comp_score = float(comp_score)
+                table = load_scores(comp_scores_file)
                 diffs = []
-                with open(comp_scores_file) as f:
-                    for line in f:
-                        if line.startswith("#"): continue
-                        score, lig_name = line.split()
-                        diff = float(score) - comp_score
-                        diffs.append((abs(diff), diff, lig_name))
+                append = diffs.append
+                for score, lig_name in zip(table.scores, table.names):
+                    diff = score - comp_score
+                    append((abs(diff), diff, lig_name))
+                    sum_squares[lig_name] = sum_squares.get(lig_name, 0.0) + diff ** 2
+                    counts[lig_name] = counts.get(lig_name, 0) + 1
                 diffs.sort()
                 per_protein_file = SCORES_DIR / f"scores_{comp_lig_name}" / f"scores_{comp_lig_name}_in_{protein_name}.txt"
-                per_protein_file.parent.mkdir(parents=True, exist_ok=True)
+                ensure_dir(per_protein_file.parent)
                 with open(per_protein_file, "w") as f:
-                    f.write("# ScoreDiff  Ligand\n")
-                    for _, diff, lig_name in diffs:
-                        f.write(f"{diff:+.4f} {lig_name}\n")
-                for _, diff, lig_name in diffs:
-                    rms_scores.append((lig_name, diff))
-            ligand_rms = {}
-            for lig_name, diff in rms_scores:
-                ligand_rms.setdefault(lig_name, []).append(diff)
-            rms_list = []
-            for lig_name, diffs in ligand_rms.items():
-                rms = math.sqrt(sum(d**2 for d in diffs) / len(diffs))
-                rms_list.append((rms, lig_name))
-            rms_list.sort()
+                    f.write("# ScoreDiff  Ligand\n" + "".join(f"{diff:+.4f} {lig_name}\n" for _, diff, lig_name in diffs))
+            rms_list = sorted((math.sqrt(total / counts[lig_name]), lig_name) for lig_name, total in sum_squares.items())
             with open(rms_file, "w") as f:
                 write_header(f, f"RMS values for all ligands relative to {comp_lig_name}.", columns=["RMS", "Ligand"])
-                for rms, lig_name in rms_list:
-                    f.write(f"{rms:.4f} {lig_name}\n")
+                f.write("".join(f"{rms:.4f} {lig_name}\n" for rms, lig_name in rms_list))
 
     def generate_ligand_score_summaries(self, ligands, proteins, comparison_ligands):
         SCORES_DIR = self.scores_dir
         DOCKED_LIGANDS_DIR = self.results_dir / "docked_ligands"
+        # Every summary reads the same RMS and per-protein files, so they are all read up front, side by side
+        # in a few threads (the reads wait on the disk, not on Python), and the summaries then use the cache
+        ranked_files = []
+        for comp_lig_file in comparison_ligands:
+            comp_lig_name = Path(comp_lig_file).stem
+            ranked_files.append(SCORES_DIR / f"scores_{comp_lig_name}_RMS.txt")
+            for protein_file in proteins:
+                protein_name = Path(protein_file).stem
+                ranked_files.append(SCORES_DIR / f"scores_{comp_lig_name}" / f"scores_{comp_lig_name}_in_{protein_name}.txt")
+        if ranked_files:
+            with ThreadPoolExecutor(max_workers=min(RANKED_READ_THREADS, len(ranked_files))) as executor:
+                for _ in executor.map(load_ranked_lines, ranked_files):
+                    pass
         for ligand_file in ligands:
             ligand_name = Path(ligand_file).stem
             # Handle models
@@ -564,42 +929,32 @@ class ScoreManager:
                 self.write_ligand_summary(summary_file, ligand_name, proteins, comparison_ligands, SCORES_DIR)
 
     def write_ligand_summary(self, summary_file, ligand_name, proteins, comparison_ligands, SCORES_DIR):
-        summary_file.parent.mkdir(parents=True, exist_ok=True)  # Ensure directory exists
+        ensure_dir(summary_file.parent)  # Ensure directory exists
         with open(summary_file, "w") as f:
             for comp_lig_file in comparison_ligands:
                 comp_lig_name = Path(comp_lig_file).stem
                 # RMS and rank
                 rms_file = SCORES_DIR / f"scores_{comp_lig_name}_RMS.txt"
-                rms_rank = None
-                rms_value = None
-                if rms_file.exists():
-                    with open(rms_file) as rf:
-                        # The strip() will handle empty lines. Now we just need to ignore comments.
-                        rms_lines = [line.strip() for line in rf if line.strip() and not line.strip().startswith("#")] 
-                        for idx, line in enumerate(rms_lines):
-                            # This part of the code should now only see valid data lines
-                            if ligand_name in line:
-                                rms_value = float(line.split()[0]) 
-                                rms_rank = idx + 1
-                                break
+                # Each ranked file is read once for all the ligands, not once per ligand (see load_ranked_lines)
+                rms_lines = load_ranked_lines(rms_file)
+                found = find_ranked(rms_lines, ligand_name) if rms_lines else None
                 f.write(f"{comp_lig_name}:\n")
-                if rms_value is not None:
-                    f.write(f"  RMS: {rms_value:.4f} - #{rms_rank}/{len(rms_lines)}\n")
+                if found is not None:
+                    rms_rank, line = found
+                    rms_value = float(line.split()[0])
+                    f.write(f"  RMS: {rms_value:.4f} - #{rms_rank}/{len(rms_lines.lines)}\n")
                 else:
                     f.write("  RMS: N/A\n")
                 # Per-protein scores and ranks
                 for protein_file in proteins:
                     protein_name = Path(protein_file).stem
                     per_protein_file = SCORES_DIR / f"scores_{comp_lig_name}" / f"scores_{comp_lig_name}_in_{protein_name}.txt"
-                    if per_protein_file.exists():
-                        with open(per_protein_file) as pf:
-                            lines = [line.strip() for line in pf if line.strip()]
-                            for idx, line in enumerate(lines):
-                                if ligand_name in line:
-                                    diff = line.split()[0]
-                                    rank = idx + 1
-                                    f.write(f"  {protein_name}: {diff} - #{rank}/{len(lines)}\n")
-                                    break
+                    lines = load_ranked_lines(per_protein_file)
+                    found = find_ranked(lines, ligand_name) if lines else None
+                    if found is not None:
+                        rank, line = found
+                        diff = line.split()[0]
+                        f.write(f"  {protein_name}: {diff} - #{rank}/{len(lines.lines)}\n")
 
     def calculate_top_dockers(self, proteins):
         SCORES_DIR = self.scores_dir / "scores_proteins"
@@ -614,28 +969,41 @@ class ScoreManager:
             sorted_file = protein_dir / f"scores_{protein_name}_sorted.txt"
 
             if scores_file.exists():
-                with open(scores_file, "r") as f:
-                    lines = [line for line in f if not line.startswith("#")]
-                    sorted_scores = sorted(lines, key=lambda x: float(x.split()[0]))
+                table = load_scores(scores_file)
+                lines = table.lines
+                # The scores were parsed once when the file was loaded; sort line indexes by them
+                sorted_scores = [lines[i] for i in sorted(range(len(lines)), key=table.scores.__getitem__)]
+                # The sorted list goes to two files, so it is joined once and written in one go to each
+                sorted_text = "".join(sorted_scores)
                 # Write unsorted with header
                 with open(unsorted_file, "w") as f:
-                    f.write("# Score  Ligand\n")
-                    f.writelines(lines)
+                    f.write("# Score  Ligand\n" + "".join(lines))
                 # Write sorted with header
                 with open(sorted_file, "w") as f:
                     write_header(f, "Docking scores for all ligands against this protein.", columns=["Score", "Ligand"])
-                    for line in sorted_scores:
-                        f.write(line)
+                    f.write(sorted_text)
                 # Also update top_dockers_file with header
                 with open(top_dockers_file, "w") as f:
                     write_header(f, "Docking scores for all ligands against this protein.", columns=["Score", "Ligand"])
-                    f.writelines(sorted_scores)
+                    f.write(sorted_text)
                 self.write_stats(scores_file)
                 self.write_scores_csv(scores_file)
                 print(f"Top dockers for {protein_name} saved to {top_dockers_file}.")
             else:
                 print(f"No scores file found for protein: {protein_name}. Skipping sorting.")
 
+    def read_scores(self, scores_file):
+        """
+        Reads a scores file into {ligand_name: score} in one pass.
+        If a ligand is listed more than once, its first score is kept (the same one get_score returns).
+        """
+        scores = {}
+        table = load_scores(scores_file)
+        for name, score in zip(table.names, table.scores):
+            if name not in scores:
+                scores[name] = score
+        return scores
+
     def get_score(self, scores_file, ligand_name):
         if scores_file.exists():
             with open(scores_file, "r") as f:
@@ -661,13 +1029,24 @@ with open(LOG_FILE, "a") as log:
 class LogManager:
     def __init__(self, log_file):
         self.log_file = log_file
+        # Opened on the first message and kept open, instead of being reopened for every line
+        self._log = None
 
     def log(self, message):
-        with open(self.log_file, "a") as log:
-            log.write(f"{time.ctime(time.time())}: {message}\n")
-            log.flush()
+        if self._log is None:
+            # Line-buffered, so each message is still in the file as soon as it's logged
+            self._log = open(self.log_file, "a", buffering=1)
+        self._log.write(f"{time.ctime(time.time())}: {message}\n")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
 
 class LigandManager:
+    # Model files of each ligand already extracted or found in the cache, by ligand file
+    _models_cache = {}
+
     def __init__(self, ligand_dir, cache_dir):
         self.ligand_dir = ligand_dir
         self.cache_dir = cache_dir
@@ -676,22 +1055,51 @@ class LigandManager:
         """
         Extracts models from a ligand file. Now accepts a callback function
         to report progress.
+        Returns the list of model files, so callers don't have to list the cache folder again.
         """
+        if ligand_file in self._models_cache:
+            if display_callback and display_args:
+                display_callback(**display_args, current_file_progress=1.0)
+            return self._models_cache[ligand_file]
+
         ligand_name = Path(ligand_file).stem
         output_dir = self.cache_dir / f"models_{ligand_name}"
         output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Check if models are already extracted
-        if list(output_dir.glob("*.pdbqt")):
-            # If a callback is provided, show a quick 100% update
+        done_file = output_dir / MODELS_DONE
+
+        # A marker newer than the ligand file means its models are in place, and it names them,
+        # so the folder doesn't have to be listed
+        try:
+            finished = os.stat(done_file).st_mtime >= os.stat(ligand_file).st_mtime
+        except FileNotFoundError:
+            finished = False
+        if finished:
             if display_callback and display_args:
                 display_callback(**display_args, current_file_progress=1.0)
             print(f"Models for {ligand_name} already extracted.")
-            return
-
-        with open(ligand_file) as f:
-            content = f.read()
-            if "MODEL" in content:
+            models = [os.path.join(output_dir, name) for name in done_file.read_text().splitlines()]
+            self._models_cache[ligand_file] = models
+            return models
+
+        # Check if models are already extracted (folders from before the marker was written)
+        models = list_files(output_dir, ".pdbqt")
+        if models:
+            # The folder changes whenever models are written into it, so a ligand file newer than
+            # the folder was replaced after its models were extracted
+            if os.stat(output_dir).st_mtime >= os.stat(ligand_file).st_mtime:
+                # If a callback is provided, show a quick 100% update
+                if display_callback and display_args:
+                    display_callback(**display_args, current_file_progress=1.0)
+                print(f"Models for {ligand_name} already extracted.")
+                self._write_models_done(done_file, models)
+                self._models_cache[ligand_file] = models
+                return models
+            print(f"{ligand_name} changed since its models were extracted; extracting them again.")
+            for model_path in models:
+                os.remove(model_path)
+
+        with open(ligand_file, "rb") as f:
+            if has_models(f):
                 # This is where the work happens that takes time
                 # We can't easily monitor subprocess.run, so we'll update before and after
                 if display_callback and display_args:
@@ -706,23 +1114,46 @@ class LigandManager:
                      display_callback(**display_args, current_file_progress=0.8) # Show 80%
                 
                 # ... (rest of the renaming logic is the same) ...
-                for model_file in output_dir.glob(f"{ligand_name}_model*.pdbqt"):
+                for model_path in list_files(output_dir, ".pdbqt"):
+                    model_file = Path(model_path)
+                    if not model_file.name.startswith(f"{ligand_name}_model"):
+                        continue
                     stem_parts = model_file.stem.split("_model")
                     model_index = stem_parts[1] if len(stem_parts) == 2 and stem_parts[1].isdigit() else model_file.stem.split("_")[-1]
                     new_name = f"{ligand_name}_model_{model_index}.pdbqt"
                     model_file.rename(output_dir / new_name)
             else:
-                shutil.copy(ligand_file, output_dir / f"{ligand_name}.pdbqt")
+                # A single-model ligand is its own model; a hard link puts it in the cache without copying the data
+                try:
+                    os.link(ligand_file, output_dir / f"{ligand_name}.pdbqt")
+                except OSError:
+                    # Different filesystem (or no hard link support), so copy instead
+                    shutil.copy(ligand_file, output_dir / f"{ligand_name}.pdbqt")
 
         # Report 100% completion for the current file
         if display_callback and display_args:
             display_callback(**display_args, current_file_progress=1.0)
 
+        models = list_files(output_dir, ".pdbqt")
+        self._write_models_done(done_file, models)
+        self._models_cache[ligand_file] = models
+        return models
+
+    @staticmethod
+    def _write_models_done(done_file, models):
+        # Only written after the models are all in place, so an interrupted extraction has no marker
+        done_file.write_text("".join(os.path.basename(model) + "\n" for model in models))
+
     @staticmethod
     def clean_ligand_name(name):
         return name.split(".")[0].replace(" ", "_")
 
 class ProteinManager:
+    # Docking boxes already worked out, by protein file (shared by every ProteinManager)
+    _box_cache = {}
+    # Grid map prefix of each protein (None if Vina couldn't write its maps), by protein file
+    _maps_cache = {}
+
     def __init__(self, protein_dir, config_dir):
         self.protein_dir = protein_dir
         self.config_dir = config_dir
@@ -747,46 +1178,96 @@ class ProteinManager:
         return None
 
     def calculate_docking_box(self, protein_file):
+        # Every docking task asks for its protein's box, so each one is only worked out once
+        if protein_file in self._box_cache:
+            return self._box_cache[protein_file]
         protein_name = Path(protein_file).stem
         box = self.get_box_from_config(protein_name)
         if box and all(v is not None for v in box):
+            self._box_cache[protein_file] = box
             return box
         # fallback to automatic calculation
         center_x, center_y, center_z = 0, 0, 0
-        count = 0
-        with open(protein_file) as f:
-            for line in f:
-                if line.startswith("ATOM"):
-                    parts = line.split()
-                    center_x += float(parts[6])
-                    center_y += float(parts[7])
-                    center_z += float(parts[8])
-                    count += 1
+        # Read as bytes: float() takes the byte slices directly, and a stray non-UTF-8 byte in a REMARK line can't stop the run
+        with open(protein_file, "rb") as f:
+            atom_lines = [line for line in f if line.startswith(b"ATOM")]
+        count = len(atom_lines)
         if count > 0:
-            center_x /= count
-            center_y /= count
-            center_z /= count
+            # x, y and z sit in fixed PDB columns 31-38, 39-46 and 47-54; slicing them is cheaper
+            # than split() and still right when neighbouring columns run together
+            center_x = math.fsum([float(line[30:38]) for line in atom_lines]) / count
+            center_y = math.fsum([float(line[38:46]) for line in atom_lines]) / count
+            center_z = math.fsum([float(line[46:54]) for line in atom_lines]) / count
         size_x, size_y, size_z = 20, 20, 20
-        return center_x, center_y, center_z, size_x, size_y, size_z
+        box = center_x, center_y, center_z, size_x, size_y, size_z
+        self._box_cache[protein_file] = box
+        return box
+
+    def precompute_maps(self, protein_file, maps_dir):
+        """
+        Writes the Vina grid maps for a protein once (vina --write_maps), so each docking job
+        can load them with --maps instead of recomputing them for every ligand.
+        The maps are reused until the protein's docking box changes.
+        Returns the map prefix, or None if Vina could not write the maps.
+        """
+        if protein_file in self._maps_cache:
+            return self._maps_cache[protein_file]
+        protein_name = Path(protein_file).stem
+        maps_dir.mkdir(parents=True, exist_ok=True)
+        prefix = maps_dir / protein_name
+        # Records the box the maps were written for; only present once the maps are complete
+        box_file = maps_dir / f"{protein_name}.box"
+
+        box = self.calculate_docking_box(protein_file)
+        box_text = " ".join(str(v) for v in box)
+        if box_file.exists() and box_file.read_text() == box_text:
+            self._maps_cache[protein_file] = prefix
+            return prefix
+        box_file.unlink(missing_ok=True)
+
+        center_x, center_y, center_z, size_x, size_y, size_z = box
+        result = subprocess.run([
+            "vina",
+            "--receptor", str(protein_file),
+            "--center_x", str(center_x),
+            "--center_y", str(center_y),
+            "--center_z", str(center_z),
+            "--size_x", str(size_x),
+            "--size_y", str(size_y),
+            "--size_z", str(size_z),
+            "--write_maps", str(prefix)
+        ], capture_output=True, text=True)
+        if result.returncode != 0:
+            self._maps_cache[protein_file] = None
+            return None
+        box_file.write_text(box_text)
+        self._maps_cache[protein_file] = prefix
+        return prefix
 
 class ProgressManager:
     def __init__(self, cache_file, score_manager):
         self.cache_file = cache_file
         self.score_manager = score_manager
+        self.last_flush = 0.0
 
     def read_progress(self):
         if self.cache_file.exists():
             progress = {}
-            with open(self.cache_file) as f:
-                for line in f:
-                    if "=" in line:
-                        key, value = line.strip().split("=", 1)
-                        try:
-                            # First, try to convert the value to an integer
-                            progress[key] = int(value)
-                        except ValueError:
-                            # If that fails, it must be a decimal (float)
-                            progress[key] = float(value)
+            # The file is a handful of KEY=value lines, read in one go
+            for line in self.cache_file.read_text().splitlines():
+                key, sep, value = line.strip().partition("=")
+                if not sep or key.startswith("#"):
+                    continue
+                try:
+                    # First, try to convert the value to an integer
+                    progress[key] = int(value)
+                except ValueError:
+                    # If that fails, it must be a decimal (float)
+                    try:
+                        progress[key] = float(value)
+                    except ValueError:
+                        # A value that isn't a number is left out, so the run starts that counter from its default
+                        continue
             return progress
         else:
             # If the cache file doesn't exist, we must exit after it's created
@@ -794,9 +1275,11 @@ class ProgressManager:
             return {}
 
     def update_progress(self, progress):
-        with open(self.cache_file, "w") as f:
-            for key, value in progress.items():
-                f.write(f"{key}={value}\n")
+        # Written to a temp file and renamed over the old one, so a run killed mid-write keeps the previous progress
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, "w") as f:
+            f.write("".join(f"{key}={value}\n" for key, value in progress.items()))
+        os.replace(tmp_file, self.cache_file)
 
     def terminate_script(self, signal_received, frame):
         print("\nTermination signal received. Saving progress...")
@@ -810,10 +1293,21 @@ class ProgressManager:
             "TOTAL_TASK_TIME": globals().get("TOTAL_TASK_TIME", 0.0)
         }
         self.update_progress(progress)
+        # Scores still in memory would otherwise be lost, while the progress cache already counts them as done
+        self.score_manager.flush_scores()
         self.score_manager.write_failed_docking_summary(FAILED_DOCKINGS)
         exit(0)
 
-    def update_from_globals(self):
+    def update_from_globals(self, force=False):
+        # Called after every task; the file is only rewritten every PROGRESS_FLUSH_INTERVAL seconds unless forced.
+        # Falling behind is safe: a resumed run skips anything already in the scores files.
+        now = time.monotonic()
+        if not force and now - self.last_flush < PROGRESS_FLUSH_INTERVAL:
+            return
+        self.last_flush = now
+        # Scores go to disk first, so the saved indices never point past a task whose score was still
+        # buffered; the scores files are what a resumed run checks to skip finished (ligand, protein) pairs
+        self.score_manager.flush_scores()
         self.update_progress({
             "COMPARISON_LIGAND_INDEX": globals().get("COMPARISON_LIGAND_INDEX", 0),
             "COMPARISON_PROTEIN_INDEX": globals().get("COMPARISON_PROTEIN_INDEX", 0),
@@ -825,6 +1319,11 @@ class ProgressManager:
         })
 
 class DockingTask:
+    # Receptor options and box options of the Vina command, by (protein file, map prefix, box)
+    _receptor_args_cache = {}
+    # Vina search options (cpu, exhaustiveness, ...) of each settings dict, by id(), kept with the dict they came from
+    _search_args_cache = {}
+
     def __init__(self, ligand_file, protein_file, model_index, config, results_dir, debug, score_manager):
         self.ligand_file = ligand_file
         self.protein_file = protein_file
@@ -833,16 +1332,82 @@ class DockingTask:
         self.results_dir = results_dir
         self.debug = debug
         self.score_manager = score_manager
+        # Worked out once; every step of the task uses them
+        self.ligand_name = Path(ligand_file).stem
+        self.protein_name = Path(protein_file).stem
 
     def run(self):
-        ligand_name = Path(self.ligand_file).stem
-        protein_name = Path(self.protein_file).stem
+        vina_command, output_file, log_file = self.run_vina()
+        self.finish(vina_command, output_file, log_file)
+
+    def output_paths(self):
+        """Returns (output_file, log_file) for this task, in the results temp folder."""
+        ligand_name = self.ligand_name
+        protein_name = self.protein_name
         output_file = self.results_dir / f"temp/{ligand_name}_model{self.model_index}_vs_{protein_name}.pdbqt"
         log_file = self.results_dir / f"temp/{ligand_name}_model{self.model_index}_vs_{protein_name}.log"
+        return output_file, log_file
+
+    def build_vina_command(self, box, ligand_args, output_args):
+        """
+        Builds the Vina command line for this task's protein and settings.
+        ligand_args and output_args are the ligand and output options, e.g.
+        ["--ligand", file] and ["--out", file], or ["--batch", ...] and ["--dir", folder].
+        """
+        # Maps written by precompute_maps() already hold the receptor and box; every job
+        # (and every worker thread) uses the same map files, written once before docking starts
+        map_prefix = ProteinManager._maps_cache.get(self.protein_file) if is_enabled(self.config.get("use_maps")) else None
+
+        # The receptor and box options only depend on the protein, so they're built once per protein
+        key = (self.protein_file, map_prefix, box)
+        receptor_args = self._receptor_args_cache.get(key)
+        if receptor_args is None:
+            if map_prefix is not None:
+                receptor_args = (["vina", "--maps", str(map_prefix)], [])
+            else:
+                center_x, center_y, center_z, size_x, size_y, size_z = box
+                receptor_args = (
+                    ["vina", "--receptor", str(self.protein_file)],
+                    [
+                        "--center_x", str(center_x),
+                        "--center_y", str(center_y),
+                        "--center_z", str(center_z),
+                        "--size_x", str(size_x),
+                        "--size_y", str(size_y),
+                        "--size_z", str(size_z),
+                    ]
+                )
+            self._receptor_args_cache[key] = receptor_args
+        receptor_head, box_args = receptor_args
+        return [*receptor_head, *ligand_args, *box_args, *output_args, *self.search_args()]
+
+    def search_args(self):
+        """
+        The Vina options taken straight from the settings. Every task of a run shares one settings dict,
+        so the options are worked out once for it rather than for each task.
+        """
+        cached = self._search_args_cache.get(id(self.config))
+        if cached is None or cached[0] is not self.config:
+            args = []
+            for option in ("cpu", "exhaustiveness", "energy_range", "num_modes"):
+                if option in self.config:
+                    args += [f"--{option}", str(self.config[option])]
+            cached = (self.config, args)
+            self._search_args_cache[id(self.config)] = cached
+        return cached[1]
+
+    def run_vina(self, show_progress=True):
+        """
+        Runs Vina for this task and waits for it to finish. Nothing is shared with other tasks,
+        so this can run in a worker thread (with show_progress=False); finish() does the rest.
+        Returns (vina_command, output_file, log_file).
+        """
+        output_file, log_file = self.output_paths()
 
-        (self.results_dir / "temp").mkdir(parents=True, exist_ok=True)
+        ensure_dir(self.results_dir / "temp")
         protein_manager = ProteinManager(PROTEIN_DIR, CONFIG_DIR)
-        center_x, center_y, center_z, size_x, size_y, size_z = protein_manager.calculate_docking_box(self.protein_file)
+        box = protein_manager.calculate_docking_box(self.protein_file)
+        center_x, center_y, center_z, size_x, size_y, size_z = box
 
         if self.debug:
             print("Running AutoDock Vina with the following parameters:")
@@ -853,34 +1418,43 @@ class DockingTask:
             print(f"Output: {output_file}")
             print(f"Log: {log_file}")
 
-        vina_command = [
-            "vina",
-            "--receptor", str(self.protein_file),
-            "--ligand", str(self.ligand_file),
-            "--center_x", str(center_x),
-            "--center_y", str(center_y),
-            "--center_z", str(center_z),
-            "--size_x", str(size_x),
-            "--size_y", str(size_y),
-            "--size_z", str(size_z),
-            "--out", str(output_file)
-        ]
-
-        if "cpu" in self.config:
-            vina_command += ["--cpu", self.config["cpu"]]
-        if "exhaustiveness" in self.config:
-            vina_command += ["--exhaustiveness", self.config["exhaustiveness"]]
-        if "energy_range" in self.config:
-            vina_command += ["--energy_range", self.config["energy_range"]]
-        if "num_modes" in self.config:
-            vina_command += ["--num_modes", self.config["num_modes"]]
-
-        with open(log_file, "w") as log:
-            vina_process = subprocess.Popen(vina_command, stdout=log, stderr=log)
-
-        docking_monitor = DockingProgressMonitor(display_manager)
-        docking_monitor.monitor(log_file)
-        vina_process.wait()
+        vina_command = self.build_vina_command(box, ["--ligand", str(self.ligand_file)], ["--out", str(output_file)])
+
+        # A Vina run that hangs is killed after vina_timeout seconds and recorded as a failed docking
+        timeout = vina_timeout(self.config)
+        if show_progress:
+            # Vina's output comes through a pipe so the monitor sees progress as it is printed
+            with open(log_file, "wb") as log:
+                vina_process = subprocess.Popen(vina_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+                # Killing Vina closes the pipe, so the monitor returns as it would at the end of a normal run.
+                # The timer flags that it fired, which works the same everywhere (there's no SIGKILL on Windows)
+                timed_out = threading.Event()
+                timer = threading.Timer(timeout, lambda: (timed_out.set(), vina_process.kill())) if timeout else None
+                if timer:
+                    timer.start()
+                docking_monitor = DockingProgressMonitor(display_manager)
+                with vina_process.stdout:
+                    docking_monitor.monitor(vina_process.stdout, log)
+                vina_process.wait()
+                if timer:
+                    timer.cancel()
+                    if timed_out.is_set():
+                        log.write(f"\nVina was stopped after vina_timeout ({timeout:g} s).\n".encode())
+        else:
+            with open(log_file, "w") as log:
+                try:
+                    subprocess.run(vina_command, stdout=log, stderr=log, timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    log.write(f"\nVina was stopped after vina_timeout ({timeout:g} s).\n")
+        return vina_command, output_file, log_file
+
+    def finish(self, vina_command, output_file, log_file, score=None):
+        """
+        Reads the score from a finished Vina run, records it, and moves the results into place.
+        If the caller already has the best score (a batch run reads it from the poses), the log isn't scanned for it.
+        """
+        ligand_name = self.ligand_name
+        protein_name = self.protein_name
 
         if not log_file.exists():
             print(f"Error: Log file not found: {log_file}")
@@ -888,37 +1462,25 @@ class DockingTask:
             return
 
         if self.debug:
-            display_manager.move_cursor(shutil.get_terminal_size((80, 20)).lines - 1, 0)
+            display_manager.move_cursor(TERMINAL_SIZE.lines - 1, 0)
             print(f"Contents of log file {log_file}:")
             with open(log_file, "r") as log:
                 print(log.read())
 
-        score = None
-        with open(log_file, "r") as log:
-            for line in log:
-                if line.startswith("   1"):
-                    score = line.split()[1]
-                    break
+        if score is None:
+            score = read_vina_score(log_file)
 
         log_manager.log(f"Docking completed for {ligand_name} with {protein_name}. Score: {score}")
 
-        if score and (score.replace(".", "", 1).replace("-", "", 1).isdigit() or score == "-"):
+        # read_vina_score only matches a number, and a batch run's score comes from the same table
+        if score:
             log_manager.log(f"   Valid score extracted: {score} for ligand: {ligand_name} with protein: {protein_name}")
             if self.debug:
                 print(f"Extracted score: {score} for ligand: {ligand_name} with protein: {protein_name}")
             SCORES_DIR = self.results_dir / "scores"
-            if not SCORES_DIR.exists():
-                SCORES_DIR.mkdir(parents=True, exist_ok=True)
+            ensure_dir(SCORES_DIR)
             scores_file = SCORES_DIR / f"scores_{protein_name}.txt"
-            header = "# Score  Ligand\n"
-            if not scores_file.exists() or os.path.getsize(scores_file) == 0:
-                with open(scores_file, "w") as f:
-                    f.write(header)
-            with open(scores_file, "a") as f:
-                f.write(f"{score} {ligand_name}\n")
-            self.score_manager.update_sorted_scores(scores_file)
-            self.score_manager.write_stats(scores_file)
-            self.score_manager.write_scores_csv(scores_file)
+            self.score_manager.buffer_score(scores_file, ligand_name, score)
             if self.debug:
                 print(f"Score stored in {scores_file}")
         else:
@@ -926,20 +1488,184 @@ class DockingTask:
             print(f"Failed to extract a valid score from log file: {log_file}")
             FAILED_DOCKINGS.append((ligand_name, protein_name))
 
-        ligand_name = Path(self.ligand_file).stem.split(".")[0]
+        ligand_name = self.ligand_name.split(".")[0]
         model_part = ""
-        if "_model_" in Path(self.ligand_file).stem:
-            model_part = Path(self.ligand_file).stem.split("_model_")[-1]
+        if "_model_" in self.ligand_name:
+            model_part = self.ligand_name.split("_model_")[-1]
             dest_dir = self.results_dir / "docked_ligands" / f"docked_{ligand_name}" / f"docked_{ligand_name}_model{model_part}"
         else:
             dest_dir = self.results_dir / "docked_ligands" / f"docked_{ligand_name}"
-        dest_dir.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(output_file), dest_dir / output_file.name)
-        shutil.move(str(log_file), dest_dir / log_file.name)
+        # A ligand's folder is shared by all its proteins, so it is only created for the first one
+        ensure_dir(dest_dir)
+        # A failed run may not have written any poses
+        if output_file.exists():
+            move_file(output_file, dest_dir / output_file.name)
+        move_file(log_file, dest_dir / log_file.name)
 
         env_info = f"Python version: {sys.version}"
         self.score_manager.write_metadata(dest_dir, vina_command, env_info)
 
+def run_vina_batch(tasks):
+    """
+    Docks several ligands against the same protein with one `vina --batch` run (Vina 1.2+),
+    so the receptor is read and its maps are built once for the whole batch instead of once per ligand.
+    Each ligand's poses and a log with its score table (rebuilt from the poses' REMARK VINA RESULT
+    lines) are put where finish() expects them.
+    Returns [(task, (vina_command, output_file, log_file, score)), ...], score being the best pose's
+    affinity (None if Vina wrote no poses for that ligand).
+    """
+    first = tasks[0]
+    protein_name = first.protein_name
+    # Batches run side by side in worker threads, so each gets its own uniquely named folder
+    ensure_dir(first.results_dir / "temp")
+    batch_dir = Path(tempfile.mkdtemp(prefix=f"batch_{protein_name}_", dir=first.results_dir / "temp"))
+
+    box = ProteinManager(PROTEIN_DIR, CONFIG_DIR).calculate_docking_box(first.protein_file)
+    vina_command = first.build_vina_command(box, ["--batch", *[str(task.ligand_file) for task in tasks]], ["--dir", str(batch_dir)])
+    # vina_timeout is per ligand, so a batch gets that much time for each ligand in it
+    timeout = vina_timeout(first.config)
+    with open(batch_dir / "batch.log", "w") as log:
+        try:
+            subprocess.run(vina_command, stdout=log, stderr=log, timeout=timeout * len(tasks) if timeout else None)
+        except subprocess.TimeoutExpired:
+            # Ligands Vina finished before it was stopped still have their poses; the rest are failed dockings
+            pass
+
+    results = []
+    # Vina's own output, read once and only if some ligand has no poses to show why
+    batch_log = None
+    for task in tasks:
+        output_file, log_file = task.output_paths()
+        batch_output = batch_dir / f"{task.ligand_name}_out.pdbqt"
+        with open(log_file, "w") as log:
+            log.write(f"Vina batch run for {protein_name}\n")
+            log.write("mode |   affinity | dist from best mode\n")
+            score = None
+            if batch_output.exists():
+                mode = 0
+                with open(batch_output) as f:
+                    for line in f:
+                        if line.startswith("REMARK VINA RESULT:"):
+                            mode += 1
+                            affinity, rmsd_lb, rmsd_ub = line.split()[3:6]
+                            log.write(f"{mode:4d} {affinity:>10} {rmsd_lb:>10} {rmsd_ub:>10}\n")
+                            if mode == 1:
+                                score = affinity
+                os.replace(batch_output, output_file)
+            else:
+                log.write("No poses were written for this ligand.\n")
+                if batch_log is None:
+                    batch_log = (batch_dir / "batch.log").read_text(errors="replace")
+                log.write(f"\nOutput of the Vina batch run:\n{batch_log}")
+        results.append((task, (vina_command, output_file, log_file, score)))
+
+    # Nothing else from the batch is kept, so the temp folder only holds per-ligand files
+    shutil.rmtree(batch_dir, ignore_errors=True)
+    return results
+
+def _run_vina_in_worker(tasks):
+    # Runs in a worker thread: no progress display, the main thread records the results
+    if len(tasks) == 1:
+        return [(tasks[0], tasks[0].run_vina(show_progress=False))]
+    return run_vina_batch(tasks)
+
+def run_docking_tasks_parallel(tasks, workers, batch_size=1, core_sets=None):
+    """
+    Runs DockingTasks with up to `workers` Vina jobs at a time.
+    With batch_size > 1, tasks for the same protein go to Vina batch_size at a time (see run_vina_batch).
+    Yields (task, vina_result) as each job finishes, vina_result being the arguments for task.finish(), so the caller
+    can record scores and progress from the main thread only.
+    The workers are threads: each one just starts a Vina process and waits for it (which releases the GIL),
+    so there's no need for a Python interpreter per worker or for pickling tasks back and forth.
+    With core_sets (see worker_core_sets), each worker thread is pinned to its own set of CPUs.
+    """
+    tasks_by_protein = {}
+    for task in tasks:
+        tasks_by_protein.setdefault(task.protein_file, []).append(task)
+    chunks = []
+    for protein_tasks in tasks_by_protein.values():
+        # As few Vina runs as batch_size allows, with the ligands spread evenly over them
+        # (e.g. 51 tasks at batch_size 50 are two runs of 25 and 26, not 50 and 1)
+        count = len(protein_tasks)
+        runs = math.ceil(count / batch_size)
+        for run in range(runs):
+            chunks.append(protein_tasks[run * count // runs:(run + 1) * count // runs])
+
+    # The pool starts one thread per worker, each taking the next core set as it starts
+    pinning = {"initializer": _pin_worker_thread, "initargs": (deque(core_sets),)} if core_sets else {}
+    with ThreadPoolExecutor(max_workers=workers, **pinning) as executor:
+        # Like xargs -P, only a couple of jobs per worker are queued at a time and the next one is submitted
+        # as each finishes, so a big campaign never holds a future for every task
+        chunk_iter = iter(chunks)
+        running = {executor.submit(_run_vina_in_worker, chunk) for chunk in islice(chunk_iter, 2 * workers)}
+        try:
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # Refill the queue before handing results back, so the workers never wait on the main thread
+                    for chunk in islice(chunk_iter, 1):
+                        running.add(executor.submit(_run_vina_in_worker, chunk))
+                    yield from future.result()
+        finally:
+            # On Ctrl-C (or any early exit) no new Vina jobs are started while the running ones finish
+            for future in running:
+                future.cancel()
+
+def task_positions(model_counts, total_proteins, start=(0, 0, 0)):
+    """
+    Yields (ligand_index, model_index, protein_index) for every ligand docking task in order,
+    starting at `start` (the indices saved in the progress cache) so a resumed run picks up where it stopped.
+    model_counts holds the number of models of each ligand.
+    """
+    first_ligand, first_model, first_protein = start
+    for ligand_index in range(first_ligand, len(model_counts)):
+        for model_index in range(first_model if ligand_index == first_ligand else 0, model_counts[ligand_index]):
+            resuming = ligand_index == first_ligand and model_index == first_model
+            for protein_index in range(first_protein if resuming else 0, total_proteins):
+                yield ligand_index, model_index, protein_index
+
+def ligand_properties(model_file):
+    """
+    Returns (heavy atoms, torsions) of a PDBQT model, read straight from its ATOM/HETATM and TORSDOF lines.
+    A cheap stand-in for molecular weight and flexibility when deciding whether a model is worth docking.
+    """
+    heavy_atoms = 0
+    torsions = 0
+    with open(model_file, "rb") as f:
+        for line in f:
+            if line.startswith((b"ATOM", b"HETATM")):
+                # The AutoDock atom type is the last column
+                if line.split()[-1] not in HYDROGEN_TYPES:
+                    heavy_atoms += 1
+            elif line.startswith(b"TORSDOF"):
+                torsions = int(line.split()[1])
+    return heavy_atoms, torsions
+
+def screen_models(all_ligands_models, settings, report_file):
+    """
+    Returns the names of the models over the optional max_heavy_atoms / max_torsions limits in config.txt,
+    and lists them with their properties in report_file. With neither limit set nothing is screened out.
+    """
+    max_heavy_atoms = int(settings.get("max_heavy_atoms") or 0)
+    max_torsions = int(settings.get("max_torsions") or 0)
+    if not max_heavy_atoms and not max_torsions:
+        return set()
+    screened_out = set()
+    with open(report_file, "w") as report:
+        write_header(report, "Models skipped by the max_heavy_atoms / max_torsions pre-screen.", columns=["Model", "Heavy_Atoms", "Torsions"])
+        for models in all_ligands_models:
+            for model_file in models:
+                heavy_atoms, torsions = ligand_properties(model_file)
+                if (max_heavy_atoms and heavy_atoms > max_heavy_atoms) or (max_torsions and torsions > max_torsions):
+                    model_name = Path(model_file).stem
+                    screened_out.add(model_name)
+                    report.write(f"{model_name} {heavy_atoms} {torsions}\n")
+    return screened_out
+
+def read_docked_names(scores_file):
+    """Returns the set of ligand names already in a scores_<protein>.txt file."""
+    return set(load_scores(scores_file).names)
+
 class ResultOrganizer:
     def __init__(self, results_dir):
         self.results_dir = results_dir
@@ -948,7 +1674,8 @@ class ResultOrganizer:
         temp_dir = self.results_dir / "temp"
         DOCKED_LIGANDS_DIR = self.results_dir / "docked_ligands"
         DOCKED_LIGANDS_DIR.mkdir(parents=True, exist_ok=True)
-        for file in temp_dir.glob("*"):
+        for file_path in list_files(temp_dir):
+            file = Path(file_path)
             parts = file.stem.split("_vs_")[0].split("_model")
             ligand_base = parts[0]
             model_part = f"model{parts[1]}" if len(parts) > 1 else None
@@ -957,13 +1684,20 @@ class ResultOrganizer:
                 dest_dir = DOCKED_LIGANDS_DIR / f"docked_{ligand_base_clean}" / f"docked_{ligand_base_clean}_{model_part}"
             else:
                 dest_dir = DOCKED_LIGANDS_DIR / f"docked_{ligand_base_clean}"
-            dest_dir.mkdir(parents=True, exist_ok=True)
-            shutil.move(str(file), dest_dir / file.name)
+            # Each destination folder is only created once, however many files go into it
+            ensure_dir(dest_dir)
+            dest_file = dest_dir / file.name
+            # An empty leftover (e.g. from a run that was stopped as Vina started) never replaces a finished result
+            if os.path.getsize(file_path) == 0 and dest_file.exists():
+                os.remove(file_path)
+                continue
+            move_file(file_path, dest_file)
 
 class DisplayManager:
     def __init__(self):
         pass
 
+    @renders
     def display_progress(self, current_task, total_tasks, ligand_index, total_ligands, model_index, total_models, protein_index, total_proteins, ligand_name, protein_name):
         """
         Display the progress of the docking process with an estimated time to completion (ETC).
@@ -978,7 +1712,7 @@ class DisplayManager:
         :param ligand_name: Name of the current ligand.
         :param protein_name: Name of the current protein.
         """
-        console_width = shutil.get_terminal_size((80, 20)).columns
+        console_width = TERMINAL_SIZE.columns
         progress_bar_length = console_width - 30
 
         remaining_tasks = total_tasks - current_task
@@ -986,7 +1720,8 @@ class DisplayManager:
         # --- ETC Calculation ---
         # 1. Rolling Average ETC (Recent Tasks)
         if TASK_DURATIONS:
-            rolling_avg_time = statistics.mean(TASK_DURATIONS)
+            # Plain float average; statistics.mean does exact fraction arithmetic on every redraw
+            rolling_avg_time = sum(TASK_DURATIONS) / len(TASK_DURATIONS)
             rolling_etc_seconds = rolling_avg_time * remaining_tasks
         else:
             rolling_etc_seconds = 0
@@ -1002,44 +1737,50 @@ class DisplayManager:
         h, r = divmod(int(overall_etc_seconds), 3600); m, s = divmod(r, 60)
         overall_etc_str = f"{h:02}:{m:02}:{s:02}"
 
-        print("\033[H\033[J", end="")  # Clear the terminal
-        print("========================================")
-        print("         Protein-Ligand Docking         ")
-        print("========================================")
-        print()
-        print(f"Docking:")
-        print(f"Ligand file {ligand_index + 1}/{total_ligands}")
-        self.draw_progress_bar(7, 0, progress_bar_length, ligand_index + 1, total_ligands, False)
-
-        self.move_cursor(9, 0)
-        print(f"Ligand model: model {model_index + 1}/{total_models}")
-        self.draw_progress_bar(10, 0, progress_bar_length, model_index + 1, total_models, False)
-
-        self.move_cursor(12, 0)
-        print(f"Ligand progress: protein {protein_index + 1}/{total_proteins}")
-        self.draw_progress_bar(13, 0, progress_bar_length, protein_index + 1, total_proteins, False)
-
-        # Current docking progress bar
-        self.move_cursor(15, 0)
-        print("Current docking progress:")
-        self.draw_progress_bar(16, 0, progress_bar_length, 0, 100, False)
-
-        self.move_cursor(19, 0)
-        print(f"Ligand name: {ligand_name}")
-        print(f"Protein name: {protein_name}")
-
         percent_through_dock = (current_task * 100) / total_tasks if total_tasks > 0 else 0
-        self.move_cursor(21, 0)
-        print(f"Total Progress: {current_task}/{total_tasks} ({percent_through_dock:.3f}%)")
-        self.draw_progress_bar(19, 0, progress_bar_length, current_task, total_tasks, False)
 
-        # Display estimated time to completion
-        self.move_cursor(24, 0)
-        print(f"ETC (Recent Avg): {rolling_etc_str}  |  ETC (Overall Avg): {overall_etc_str}")
-
-        self.move_cursor(26, 0)
-        print("Do CTRL+C to exit")
+        # The whole frame is built as one string and printed once, instead of a print per line and bar
+        frame = [
+            "\033[H\033[J",  # Clear the terminal
+            "========================================\n",
+            "         Protein-Ligand Docking         \n",
+            "========================================\n",
+            "\n",
+            "Docking:\n",
+            f"Ligand file {ligand_index + 1}/{total_ligands}\n",
+            self.progress_bar_text(7, 0, progress_bar_length, ligand_index + 1, total_ligands),
+
+            self.cursor_text(9, 0),
+            f"Ligand model: model {model_index + 1}/{total_models}\n",
+            self.progress_bar_text(10, 0, progress_bar_length, model_index + 1, total_models),
+
+            self.cursor_text(12, 0),
+            f"Ligand progress: protein {protein_index + 1}/{total_proteins}\n",
+            self.progress_bar_text(13, 0, progress_bar_length, protein_index + 1, total_proteins),
+
+            # Current docking progress bar
+            self.cursor_text(15, 0),
+            "Current docking progress:\n",
+            self.progress_bar_text(16, 0, progress_bar_length, 0, 100),
+
+            self.cursor_text(19, 0),
+            f"Ligand name: {ligand_name}\n",
+            f"Protein name: {protein_name}\n",
+
+            self.cursor_text(21, 0),
+            f"Total Progress: {current_task}/{total_tasks} ({percent_through_dock:.3f}%)\n",
+            self.progress_bar_text(19, 0, progress_bar_length, current_task, total_tasks),
+
+            # Display estimated time to completion
+            self.cursor_text(24, 0),
+            f"ETC (Recent Avg): {rolling_etc_str}  |  ETC (Overall Avg): {overall_etc_str}\n",
+
+            self.cursor_text(26, 0),
+            "Do CTRL+C to exit\n",
+        ]
+        print("".join(frame), end="")
 
+    @renders
     def display_comparison_progress(self, current_task, total_tasks, comparison_ligand_index, total_comparison_ligands, protein_index, total_proteins, comparison_ligand_name, protein_name):
         """
         Display the progress of docking for comparison ligands.
@@ -1052,32 +1793,37 @@ class DisplayManager:
         :param comparison_ligand_name: Name of the current comparison ligand.
         :param protein_name: Name of the current protein.
         """
-        console_width = shutil.get_terminal_size((80, 20)).columns
+        console_width = TERMINAL_SIZE.columns
         progress_bar_length = console_width - 30
 
-        print("\033[H\033[J", end="")  # Clear the terminal
-        print("========================================")
-        print("   Initial Calculation of Comparison    ")
-        print("========================================")
-        print()
-        print(f"Docking comparisons:")
-        print(f"Total progress: comparison ligand {comparison_ligand_index + 1}/{total_comparison_ligands}")
-        self.draw_progress_bar(7, 0, progress_bar_length, comparison_ligand_index + 1, total_comparison_ligands, False)
-        self.move_cursor(9, 0)
-        print(f"Comparison ligand progress: protein {protein_index + 1}/{total_proteins}")
-        self.draw_progress_bar(10, 0, progress_bar_length, protein_index + 1, total_proteins, False)
-        self.move_cursor(19, 0)
-        print(f"Comparison ligand name: {comparison_ligand_name}")
-        print(f"Protein name: {protein_name}")
-
         percent_through_dock = (current_task * 100) / total_tasks
-        self.move_cursor(21, 0)
-        print(f"% through dock: {percent_through_dock:.2f}%")
-        self.draw_progress_bar(22, 0, progress_bar_length, current_task, total_tasks, False)
 
-        self.move_cursor(24, 0)
-        print("Do CTRL+C to exit")
-        print()
+        # One string, printed once (see display_progress)
+        frame = [
+            "\033[H\033[J",  # Clear the terminal
+            "========================================\n",
+            "   Initial Calculation of Comparison    \n",
+            "========================================\n",
+            "\n",
+            "Docking comparisons:\n",
+            f"Total progress: comparison ligand {comparison_ligand_index + 1}/{total_comparison_ligands}\n",
+            self.progress_bar_text(7, 0, progress_bar_length, comparison_ligand_index + 1, total_comparison_ligands),
+            self.cursor_text(9, 0),
+            f"Comparison ligand progress: protein {protein_index + 1}/{total_proteins}\n",
+            self.progress_bar_text(10, 0, progress_bar_length, protein_index + 1, total_proteins),
+            self.cursor_text(19, 0),
+            f"Comparison ligand name: {comparison_ligand_name}\n",
+            f"Protein name: {protein_name}\n",
+
+            self.cursor_text(21, 0),
+            f"% through dock: {percent_through_dock:.2f}%\n",
+            self.progress_bar_text(22, 0, progress_bar_length, current_task, total_tasks),
+
+            self.cursor_text(24, 0),
+            "Do CTRL+C to exit\n",
+            "\n",
+        ]
+        print("".join(frame), end="")
 
     def draw_progress_bar(self, row, col, length, current, total, waits=False):
         """
@@ -1089,6 +1835,16 @@ class DisplayManager:
         :param total: Total progress value.
         :param waits: Optional flag to wait after each character (default: False).
         """
+        # Move the cursor to the specified position and print the progress bar
+        # (inside a render the whole frame is flushed at the end; on its own, e.g. from the docking monitor, right away)
+        print(self.progress_bar_text(row, col, length, current, total), end="", flush=RENDER_DONE.is_set())
+
+    @staticmethod
+    def progress_bar_text(row, col, length, current, total):
+        """
+        The text draw_progress_bar prints: the cursor move, the bar and its percentage
+        (or an error line if the values can't be drawn). Renders put it into their frame.
+        """
         # Check if the current value exceeds the total value
         if current > total:
             current = total
@@ -1099,13 +1855,11 @@ class DisplayManager:
 
         # Check if the progress bar length is valid
         if length <= 0:
-            print("Error: Progress bar length must be greater than 0.")
-            return
+            return "Error: Progress bar length must be greater than 0.\n"
 
         # Check if the current and total values are valid
         if current < 0 or total <= 0:
-            print("Error: Progress bar current and total values must be non-negative, and total must be greater than 0.")
-            return
+            return "Error: Progress bar current and total values must be non-negative, and total must be greater than 0.\n"
 
         # Calculate progress as a fraction (0 to 1)
         progress = current / total
@@ -1115,22 +1869,20 @@ class DisplayManager:
         empty = length - filled
 
         # Draw the progress bar
-        bar = "[" + "\033[42m \033[0m" * filled + "\033[41m \033[0m" * empty + "]"
+        bar = f"[{BAR_GREEN}{' ' * filled}{BAR_RED}{' ' * empty}{BAR_RESET}]"
         percent = f"{progress * 100:.2f}%"
 
-        # Move the cursor to the specified position and print the progress bar
-        print(f"\033[{row};{col}H{bar} {percent}", end="", flush=True)
+        return f"\033[{row};{col}H{bar} {percent}"
 
     def clear_display_area(self):
         """
         Clear the display area in the terminal.
         """
-        console_height = shutil.get_terminal_size((80, 20)).lines
-        console_width = shutil.get_terminal_size((80, 20)).columns
-        print("\033[H", end="")  # Move cursor to the top left corner
-        for _ in range(console_height):
-            print(" " * console_width)
-        print("\033[H", end="")  # Move cursor back to the top left corner
+        console_height = TERMINAL_SIZE.lines
+        console_width = TERMINAL_SIZE.columns
+        # Built as one string and printed once, rather than one print (and one terminal write) per row
+        blank_screen = (" " * console_width + "\n") * console_height
+        print("\033[H" + blank_screen + "\033[H", end="")  # From the top left corner, and back to it
 
     def move_cursor(self, row, col):
         """
@@ -1138,19 +1890,24 @@ class DisplayManager:
         :param row: The row number (1-based).
         :param col: The column number (1-based).
         """
-        print(f"\033[{row};{col}H", end="", flush=True)
+        print(self.cursor_text(row, col), end="", flush=True)
+
+    @staticmethod
+    def cursor_text(row, col):
+        """The escape sequence move_cursor prints, for building a frame as one string."""
+        return f"\033[{row};{col}H"
 
     def add_empty_lines(self):
         """
         Add empty lines to create space for display updates.
         """
-        console_height = shutil.get_terminal_size((80, 20)).lines
-        for _ in range(console_height):
-            print()
+        console_height = TERMINAL_SIZE.lines
+        print("\n" * console_height, end="")
     
+    @renders
     def display_simple_progress(self, title, current_item, total_items, item_name):
         """Displays a simple, single-line progress bar for a task."""
-        console_width = shutil.get_terminal_size((80, 20)).columns
+        console_width = TERMINAL_SIZE.columns
         
         # Clear the screen to show this new progress display
         print("\033[H\033[J", end="")
@@ -1168,13 +1925,14 @@ class DisplayManager:
         # Draw the progress bar
         progress_bar_length = console_width - 10
         filled = int(progress_bar_length * current_item // total_items)
-        bar = "[" + "\033[42m \033[0m" * filled + " " * (progress_bar_length - filled) + "]"
+        bar = f"[{BAR_GREEN}{' ' * filled}{BAR_RESET}{' ' * (progress_bar_length - filled)}]"
         print(f"\n{bar}")
 
+    @renders
     def display_extraction_progress(self, title, processed_size, total_size, item_name, start_time,
                                     current_file_size=0, current_file_progress=0.0):
         """Displays progress and ETC for both the total job and the current file."""
-        console_width = shutil.get_terminal_size((80, 20)).columns
+        console_width = TERMINAL_SIZE.columns
         
         # --- Overall Time Calculation (No changes here) ---
         total_elapsed_time = time.time() - start_time
@@ -1209,7 +1967,7 @@ class DisplayManager:
         
         progress_bar_length = console_width - 10
         overall_filled = int(progress_bar_length * processed_size // total_size) if total_size > 0 else 0
-        bar = "[" + "\033[42m \033[0m" * overall_filled + " " * (progress_bar_length - overall_filled) + "]"
+        bar = f"[{BAR_GREEN}{' ' * overall_filled}{BAR_RESET}{' ' * (progress_bar_length - overall_filled)}]"
         print(f"{bar}\n")
 
         # --- UPDATED: Current File Progress Display ---
@@ -1219,14 +1977,27 @@ class DisplayManager:
 
         file_progress_percent = current_file_progress * 100
         file_filled = int(progress_bar_length * current_file_progress)
-        file_bar = "[" + "\033[44m \033[0m" * file_filled + " " * (progress_bar_length - file_filled) + "]" # Blue bar
+        file_bar = f"[{BAR_BLUE}{' ' * file_filled}{BAR_RESET}{' ' * (progress_bar_length - file_filled)}]" # Blue bar
         print(f"{file_bar} {file_progress_percent:.0f}%")
 
     @staticmethod
     def wait_for_render_stop():
-        global IS_RENDERING
-        while IS_RENDERING:
-            time.sleep(0.01)
+        RENDER_DONE.wait()
+
+def render_in_background(render, **kwargs):
+    """
+    Runs a progress display (e.g. display_manager.display_progress) on a daemon thread, so the next
+    Vina run can start while the screen is redrawn. Anything else that draws waits for it first with
+    DisplayManager.wait_for_render_stop(). In debug mode the display is drawn right away instead,
+    since debug output would get mixed into it.
+    """
+    DisplayManager.wait_for_render_stop()
+    if DEBUG:
+        render(**kwargs)
+        return
+    # Cleared here rather than in the thread, so a wait right after this call can't miss the render
+    RENDER_DONE.clear()
+    threading.Thread(target=render, kwargs=kwargs, daemon=True).start()
 
 class CacheManager:
     def __init__(self, cache_dir, results_dir, ligand_dir, protein_dir, comparison_ligand_dir):
@@ -1237,23 +2008,31 @@ class CacheManager:
         self.comparison_ligand_dir = comparison_ligand_dir
 
     def initialize_cache(self, mode=None):
+        """
+        Sets up the cache and results folders (clearing them first for mode "clear" / "clear-everything")
+        and writes the ligand, protein and comparison ligand name lists.
+        Returns (ligand_files, protein_files, comparison_ligand_files), the same lists that were written.
+        """
         if mode == "clear":
             backup_dir = self.cache_dir / "cache_backup"
             backup_dir.mkdir(parents=True, exist_ok=True)
-            for item in self.cache_dir.iterdir():
-                if item == backup_dir:
-                    continue
-                destination = backup_dir / item.name
-                if destination.exists():
+            # Names already in the backup folder, read once; free names are then found in memory
+            with os.scandir(backup_dir) as it:
+                existing = {e.name for e in it}
+            # Names and paths straight from the directory entries; a Path is only split up on a name clash
+            with os.scandir(self.cache_dir) as it:
+                items = [(e.name, e.path) for e in it if e.name != backup_dir.name]
+            for name, path in items:
+                if name in existing:
+                    stem, suffix = os.path.splitext(name)
                     counter = 1
-                    new_name = f"{item.stem}_copy{counter}{item.suffix}"
-                    new_destination = backup_dir / new_name
-                    while new_destination.exists():
+                    name = f"{stem}_copy{counter}{suffix}"
+                    while name in existing:
                         counter += 1
-                        new_name = f"{item.stem}_copy{counter}{item.suffix}"
-                        new_destination = backup_dir / new_name
-                    destination = new_destination
-                shutil.move(str(item), str(destination))
+                        name = f"{stem}_copy{counter}{suffix}"
+                existing.add(name)
+                # Same filesystem, so this is a single rename
+                os.replace(path, backup_dir / name)
             print("Cache cleared and backed up.")
         elif mode == "clear-everything":
             shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -1271,28 +2050,30 @@ class CacheManager:
         comparison_ligand_names = self.cache_dir / "comparisonLigandNames.txt"
         progress_cache = self.cache_dir / "progress_cache.txt"
 
-        if not list(self.ligand_dir.glob("*.pdbqt")):
+        ligand_files = list_files(self.ligand_dir, ".pdbqt")
+        if not ligand_files:
             print(f"Error: No ligand files found in {self.ligand_dir}")
             exit(1)
-        with open(ligand_names, "w") as f:
-            f.writelines([str(file) + "\n" for file in self.ligand_dir.glob("*.pdbqt")])
+        ligand_names.write_text("\n".join(ligand_files) + "\n")
 
-        if not list(self.protein_dir.glob("*.pdbqt")):
+        protein_files = list_files(self.protein_dir, ".pdbqt")
+        if not protein_files:
             print(f"Error: No protein files found in {self.protein_dir}")
             exit(1)
-        with open(protein_names, "w") as f:
-            f.writelines([str(file) + "\n" for file in self.protein_dir.glob("*.pdbqt")])
+        protein_names.write_text("\n".join(protein_files) + "\n")
 
-        if not list(self.comparison_ligand_dir.glob("*.pdbqt")):
+        comparison_ligand_files = list_files(self.comparison_ligand_dir, ".pdbqt")
+        if not comparison_ligand_files:
             print(f"Error: No comparison ligand files found in {self.comparison_ligand_dir}")
             exit(1)
-        with open(comparison_ligand_names, "w") as f:
-            f.writelines([str(file) + "\n" for file in self.comparison_ligand_dir.glob("*.pdbqt")])
+        comparison_ligand_names.write_text("\n".join(comparison_ligand_files) + "\n")
 
         if not progress_cache.exists():
             with open(progress_cache, "w") as f:
                 f.write("COMPARISON_LIGAND_INDEX=0\nCOMPARISON_PROTEIN_INDEX=0\nLIGAND_INDEX=0\nMODEL_INDEX=0\nPROTEIN_INDEX=0\nCOMPLETED_TASKS=0\nTOTAL_TASK_TIME=0.0\n")
 
+        return ligand_files, protein_files, comparison_ligand_files
+
 def write_header(f, description, columns=None):
     f.write(f"# Generated: {time.ctime()}\n")
     f.write(f"# {description}\n")
@@ -1304,8 +2085,6 @@ def write_header(f, description, columns=None):
 
 # Register the termination signal handler
 progress_manager = ProgressManager(PROGRESS_CACHE, ScoreManager(RESULTS_DIR))
-signal.signal(signal.SIGINT, progress_manager.terminate_script)
-signal.signal(signal.SIGTERM, progress_manager.terminate_script)
 
 # Initialize DisplayManager
 display_manager = DisplayManager()
@@ -1320,6 +2099,14 @@ ligand_manager = LigandManager(LIGAND_DIR, CACHE_DIR)
 if __name__ == "__main__":
     import sys
 
+    # The handlers are only installed when dock.py is run, not when it's imported (e.g. by fillcache.py)
+    signal.signal(signal.SIGINT, progress_manager.terminate_script)
+    signal.signal(signal.SIGTERM, progress_manager.terminate_script)
+    if hasattr(signal, "SIGWINCH"):  # Not available on Windows
+        signal.signal(signal.SIGWINCH, refresh_terminal_size)
+    # Any exit (including exit(1) on an error) writes out scores that are still buffered
+    atexit.register(progress_manager.score_manager.flush_scores)
+    atexit.register(log_manager.close)
 
     # Initialize ScoreManager
     config_manager = ConfigManager(CONFIG_DIR, RESULTS_DIR, LIGAND_DIR, PROTEIN_DIR, COMPARISON_LIGAND_DIR)
@@ -1328,12 +2115,13 @@ if __name__ == "__main__":
 
     # Handle command-line arguments for clearing cache
     #cache_manager = CacheManager(CACHE_DIR, RESULTS_DIR, LIGAND_DIR, PROTEIN_DIR, COMPARISON_LIGAND_DIR)
+    # The ligand, protein and comparison ligand lists come back from here, so the name files aren't read back in
     if "--clear-cache" in sys.argv:
-        cache_manager.initialize_cache("clear")
+        ligands, proteins, comparison_ligands = cache_manager.initialize_cache("clear")
     elif "--clear-everything" in sys.argv:
-        cache_manager.initialize_cache("clear-everything")
+        ligands, proteins, comparison_ligands = cache_manager.initialize_cache("clear-everything")
     else:
-        cache_manager.initialize_cache()
+        ligands, proteins, comparison_ligands = cache_manager.initialize_cache()
     
     # Load the main Vina configuration from the file
     print("Loading Vina settings from config.txt...")
@@ -1352,9 +2140,7 @@ if __name__ == "__main__":
     TOTAL_TASK_TIME = float(progress.get("TOTAL_TASK_TIME", 0.0))
 
     # Load ligands, proteins, and comparison ligands
-    ligands = [line.strip() for line in open(LIGAND_NAMES)]
-    proteins = [line.strip() for line in open(PROTEIN_NAMES)]
-    comparison_ligands = [line.strip() for line in open(COMPARISON_LIGAND_NAMES)]
+    # (already listed by cache_manager.initialize_cache above)
 
     total_ligands = len(ligands)
     total_proteins = len(proteins)
@@ -1401,20 +2187,35 @@ if __name__ == "__main__":
         print("Please fill in all center_x, center_y, center_z, size_x, size_y, and size_z values before running the program again.")
         exit(1)
 
-    # Create a dedicated subfolder for output files
-    (RESULTS_DIR / "temp").mkdir(parents=True, exist_ok=True)
+    # Create a dedicated subfolder for output files (once; the docking tasks then find it in MADE_DIRS)
+    ensure_dir(RESULTS_DIR / "temp")
+
+    # Work out every protein's docking box once, before any docking starts, so worker threads
+    # only ever read the cached boxes
+    protein_manager = ProteinManager(PROTEIN_DIR, CONFIG_DIR)
+    for protein_file in proteins:
+        protein_manager.calculate_docking_box(protein_file)
+
+    # Write each protein's grid maps once, up front, instead of once per docking job
+    if is_enabled(vina_settings.get("use_maps")):
+        for protein_file in proteins:
+            print(f"Preparing grid maps for {Path(protein_file).stem}...")
+            if protein_manager.precompute_maps(protein_file, MAPS_DIR) is None:
+                print(f"  Could not write maps for {Path(protein_file).stem}; it will be docked with --receptor.")
 
     # Extract models for all ligands first
     # Extract models for all ligands first
     # Extract models for all ligands first
     print("Calculating total size of ligands for model extraction...")
-    total_ligand_size = sum(Path(f).stat().st_size for f in ligands) if ligands else 0
+    ligand_sizes = [os.stat(f).st_size for f in ligands]
+    total_ligand_size = sum(ligand_sizes)
     processed_size = 0
     extraction_start_time = time.time()
 
-    for ligand_file in ligands:
+    # Model files of each ligand, in the same order as ligands
+    all_ligands_models = []
+    for ligand_file, current_file_size in zip(ligands, ligand_sizes):
         current_file_path = Path(ligand_file)
-        current_file_size = current_file_path.stat().st_size
 
         # We create a dictionary of arguments to pass to the display function
         display_args = {
@@ -1428,11 +2229,12 @@ if __name__ == "__main__":
 
         # The extract_models function will now call the display function internally
         # using the 'display_callback' argument we added to it.
-        ligand_manager.extract_models(
+        models = ligand_manager.extract_models(
             ligand_file,
             display_callback=display_manager.display_extraction_progress,
             display_args=display_args
         )
+        all_ligands_models.append(models)
         
         # Update the total size we have processed so far
         processed_size += current_file_size
@@ -1449,11 +2251,7 @@ if __name__ == "__main__":
     )
     #time.sleep(1) # Pause for a moment to show completion
 
-    # Now count models for all ligands
-    all_ligands_models = []
-    for ligand_file in ligands:
-        models = list((CACHE_DIR / f"models_{Path(ligand_file).stem}").glob("*.pdbqt"))
-        all_ligands_models.append(models)
+    # Now count models for all ligands (extract_models already returned each ligand's model files)
 
     total_tasks = sum(len(models_for_ligand) * total_proteins for models_for_ligand in all_ligands_models)
 
@@ -1461,29 +2259,110 @@ if __name__ == "__main__":
         print("No docking tasks to perform. Check your ligand/model extraction.")
         exit(1)
 
+    # Names (file stems) used by the loops below, worked out once instead of per task
+    protein_names = [Path(p).stem for p in proteins]
+    comparison_ligand_names = [Path(c).stem for c in comparison_ligands]
+    all_ligands_model_names = [[Path(m).stem for m in models] for models in all_ligands_models]
+
+    # Ligands already docked against each protein, read once from the scores files
+    docked = {name: read_docked_names(RESULTS_DIR / "scores" / f"scores_{name}.txt") for name in protein_names}
+
+    # Optional: skip models that are too big or too flexible to be worth docking ("max_heavy_atoms = N" and/or
+    # "max_torsions = N" in config.txt); they are listed in results/screened_out_models.txt
+    screened_out = screen_models(all_ligands_models, vina_settings, RESULTS_DIR / "screened_out_models.txt")
+    if screened_out:
+        print(f"Pre-screen: skipping {len(screened_out)} models over the max_heavy_atoms / max_torsions limits.")
+
+    # Optional: run several Vina jobs at once ("workers = N" or "workers = auto" in config.txt)
+    # and/or dock several ligands per Vina run ("batch_size = N")
+    workers = worker_count(vina_settings.get("workers"))
+    batch_setting = str(vina_settings.get("batch_size") or 1).strip().lower()
+    auto_batch = batch_setting == "auto"
+    batch_size = MAX_BATCH_SIZE if auto_batch else int(batch_setting)
+    if batch_size > MAX_BATCH_SIZE:
+        print(f"batch_size {batch_size} is more than {MAX_BATCH_SIZE}; using {MAX_BATCH_SIZE} ligands per Vina run.")
+        batch_size = MAX_BATCH_SIZE
+    if workers > 1 or batch_size > 1:
+        # Each job gets an equal share of the cpu setting (or of all cores if it isn't set), so the machine
+        # isn't oversubscribed; with one worker per core every Vina run is single-threaded
+        worker_settings = dict(vina_settings)
+        total_cpu = int(worker_settings.get("cpu") or available_cpus())
+        worker_settings["cpu"] = str(max(1, total_cpu // workers))
+        # Optional: keep each worker's Vina runs on their own cores ("pin_cpus = yes"), so they aren't
+        # moved between cores (or sockets) away from their cached receptor grid
+        core_sets = []
+        if is_enabled(vina_settings.get("pin_cpus")):
+            core_sets = worker_core_sets(workers)
+            if not core_sets:
+                print(f"pin_cpus: can't give each of the {workers} workers its own CPUs here; not pinning.")
+
+        # Queue everything that isn't in a scores file yet, comparison ligands first
+        pending = []
+        for comparison_ligand_file, comparison_ligand_name in zip(comparison_ligands, comparison_ligand_names):
+            for protein_file, protein_name in zip(proteins, protein_names):
+                if comparison_ligand_name not in docked[protein_name]:
+                    pending.append(DockingTask(comparison_ligand_file, protein_file, 0, worker_settings, RESULTS_DIR, DEBUG, ScoreManager(RESULTS_DIR)))
+        comparison_task_count = len(pending)
+        for models, model_names in zip(all_ligands_models, all_ligands_model_names):
+            for model_index, (model_file, model_name) in enumerate(zip(models, model_names)):
+                for protein_file, protein_name in zip(proteins, protein_names):
+                    if model_name not in docked[protein_name] and model_name not in screened_out:
+                        pending.append(DockingTask(model_file, protein_file, model_index, worker_settings, RESULTS_DIR, DEBUG, score_manager))
+        COMPLETED_TASKS = total_tasks - (len(pending) - comparison_task_count)
+        comparison_ligand_set = set(comparison_ligands)
+        if auto_batch:
+            # As many ligands per Vina run as possible, while still giving every worker something to do
+            batch_size = max(1, min(MAX_BATCH_SIZE, math.ceil(len(pending) / workers)))
+
+        # perf_counter is monotonic, so a clock adjustment mid-run can't make a task look negative or huge
+        start_time = time.perf_counter()
+        for done, (docking_task, vina_result) in enumerate(run_docking_tasks_parallel(pending, workers, batch_size, core_sets), 1):
+            # Scores, logs and result files are only ever written from the main thread
+            docking_task.finish(*vina_result)
+
+            end_time = time.perf_counter()
+            task_duration = end_time - start_time
+            TASK_DURATIONS.append(task_duration) # For the rolling average
+            TOTAL_TASK_TIME += task_duration
+            start_time = end_time
+            # Comparison tasks are told apart by their ligand file
+            if docking_task.ligand_file not in comparison_ligand_set:
+                COMPLETED_TASKS += 1
+            progress_manager.update_from_globals()
+
+            display_manager.display_simple_progress(
+                f"Docking with {workers} workers, {batch_size} ligands per Vina run",
+                done,
+                len(pending),
+                f"{docking_task.ligand_name} vs {docking_task.protein_name}"
+            )
+
+        # Everything has been docked, so the serial loops below have nothing left to do
+        COMPARISON_LIGAND_INDEX, COMPARISON_PROTEIN_INDEX = total_comparison_ligands, 0
+        LIGAND_INDEX, MODEL_INDEX, PROTEIN_INDEX = total_ligands, 0, 0
+        progress_manager.update_from_globals(force=True)
+
     # Perform docking for comparison ligands
+    total_comparison_tasks = total_comparison_ligands * total_proteins
     while COMPARISON_LIGAND_INDEX < total_comparison_ligands:
         comparison_ligand_file = comparison_ligands[COMPARISON_LIGAND_INDEX]
-        comparison_ligand_name = Path(comparison_ligand_file).stem
+        comparison_ligand_name = comparison_ligand_names[COMPARISON_LIGAND_INDEX]
 
         while COMPARISON_PROTEIN_INDEX < total_proteins:
             protein_file = proteins[COMPARISON_PROTEIN_INDEX]
-            protein_name = Path(protein_file).stem
+            protein_name = protein_names[COMPARISON_PROTEIN_INDEX]
 
             # Check if docking for this comparison ligand and protein has already been completed
-            scores_file = RESULTS_DIR / f"scores_{protein_name}.txt"
-            if scores_file.exists():
-                with open(scores_file, "r") as f:
-                    if any(comparison_ligand_name in line for line in f):
-                        print(f"Skipping docking for {comparison_ligand_name} with {protein_name} (already completed).")
-                        COMPARISON_PROTEIN_INDEX += 1
-                        progress_manager.update_from_globals()
-                        continue
+            if comparison_ligand_name in docked[protein_name]:
+                print(f"Skipping docking for {comparison_ligand_name} with {protein_name} (already completed).")
+                COMPARISON_PROTEIN_INDEX += 1
+                progress_manager.update_from_globals()
+                continue
 
             # Display progress for comparison ligands
-            display_manager.display_comparison_progress(
+            render_in_background(display_manager.display_comparison_progress,
                 current_task=COMPARISON_LIGAND_INDEX * total_proteins + COMPARISON_PROTEIN_INDEX + 1,
-                total_tasks=total_comparison_ligands * total_proteins,
+                total_tasks=total_comparison_tasks,
                 comparison_ligand_index=COMPARISON_LIGAND_INDEX,
                 total_comparison_ligands=total_comparison_ligands,
                 protein_index=COMPARISON_PROTEIN_INDEX,
@@ -1495,6 +2374,7 @@ if __name__ == "__main__":
             # Perform docking
             docking_task = DockingTask(comparison_ligand_file, protein_file, 0, vina_settings, RESULTS_DIR, DEBUG, ScoreManager(RESULTS_DIR))
             docking_task.run()
+            docked[protein_name].add(comparison_ligand_name)
 
             # Update progress after each docking task
             COMPARISON_PROTEIN_INDEX += 1
@@ -1503,99 +2383,94 @@ if __name__ == "__main__":
         # Reset protein index and move to the next comparison ligand
         COMPARISON_PROTEIN_INDEX = 0
         COMPARISON_LIGAND_INDEX += 1
-        progress_manager.update_from_globals()
+        progress_manager.update_from_globals(force=True)
 
     # Clear the display area after comparison ligand docking
     if(not DEBUG):
         display_manager.clear_display_area()
 
     # start time for docking
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     # Perform docking for ligands
-    while LIGAND_INDEX < total_ligands:
-        ligand_file = ligands[LIGAND_INDEX]
-        models = all_ligands_models[LIGAND_INDEX] # Get models for the current ligand
-        total_models = len(models)
-
-        while MODEL_INDEX < total_models:
-            model_file = models[MODEL_INDEX]
-
-            while PROTEIN_INDEX < total_proteins:
-                protein_file = proteins[PROTEIN_INDEX]
-
-                # --- START: Insert This New Block ---
-                # 6/13/2025
-                
-                # Intelligently parse the filename to get the base model name
-                # This handles complex names from previous runs.
-                input_filename_stem = Path(model_file).stem
-                ligand_name_for_check = input_filename_stem.split('_vs_')[0]
-
-                # Check if this task's result already exists in the scores file
-                scores_file = RESULTS_DIR / "scores" / f"scores_{protein_name}.txt"
-                task_already_done = False
-                if scores_file.exists():
-                    with open(scores_file, "r") as f:
-                        # We add a space before the name to ensure we match a whole word
-                        if any(f" {ligand_name_for_check} " in line for line in f):
-                            task_already_done = True
-                
-                # If the task is done, skip it and update progress
-                if task_already_done:
-                    # You can comment out the print statement below if you don't want verbose output
-                    print(f"Skipping ({ligand_name_for_check} vs {protein_name}): Already in results.")
-                    
-                    PROTEIN_INDEX += 1
-                    COMPLETED_TASKS += 1
-                    progress_manager.update_from_globals()
-                    continue # This jumps to the next protein in the loop
-
-                # --- END: Insert This New Block ---
-
-                # Update ligand and protein names for progress display
-                ligand_name = Path(model_file).stem
-                protein_name = Path(protein_file).stem
-
-                # Display progress using our simple, persistent counter
-                display_manager.display_progress(
-                    current_task=COMPLETED_TASKS, # Use the counter here
-                    total_tasks=total_tasks,
-                    ligand_index=LIGAND_INDEX,
-                    total_ligands=total_ligands,
-                    model_index=MODEL_INDEX,
-                    total_models=total_models,
-                    protein_index=PROTEIN_INDEX,
-                    total_proteins=total_proteins,
-                    ligand_name=ligand_name,
-                    protein_name=protein_name
-                )
+    # One flat loop over every (ligand, model, protein) position, starting from the saved indices
+    model_counts = [len(models) for models in all_ligands_models]
+    for LIGAND_INDEX, MODEL_INDEX, PROTEIN_INDEX in task_positions(model_counts, total_proteins, (LIGAND_INDEX, MODEL_INDEX, PROTEIN_INDEX)):
+        # Progress is saved before each task, so the indices always point at work that hasn't been done yet
+        progress_manager.update_from_globals(force=MODEL_INDEX == 0 and PROTEIN_INDEX == 0)
+
+        model_file = all_ligands_models[LIGAND_INDEX][MODEL_INDEX]
+        model_name = all_ligands_model_names[LIGAND_INDEX][MODEL_INDEX]
+        protein_file = proteins[PROTEIN_INDEX]
+
+        # --- START: Insert This New Block ---
+        # 6/13/2025
+        
+        # Intelligently parse the filename to get the base model name
+        # This handles complex names from previous runs.
+        input_filename_stem = model_name
+        ligand_name_for_check = input_filename_stem.split('_vs_')[0]
+
+        # Check if this task's result already exists in the scores file
+        protein_name = protein_names[PROTEIN_INDEX]
+        # Whole names are compared, so one ligand name inside another doesn't count
+        task_already_done = ligand_name_for_check in docked[protein_name]
+        
+        # If the task is done, skip it and update progress
+        if task_already_done:
+            # You can comment out the print statement below if you don't want verbose output
+            print(f"Skipping ({ligand_name_for_check} vs {protein_name}): Already in results.")
+            
+            COMPLETED_TASKS += 1
+            continue # This jumps to the next protein in the loop
+
+        # --- END: Insert This New Block ---
+
+        # Screened out before docking, so it counts as done without running Vina
+        if model_name in screened_out:
+            COMPLETED_TASKS += 1
+            continue
+
+        # Update ligand and protein names for progress display
+        ligand_name = model_name
+
+        # Display progress using our simple, persistent counter
+        render_in_background(display_manager.display_progress,
+            current_task=COMPLETED_TASKS, # Use the counter here
+            total_tasks=total_tasks,
+            ligand_index=LIGAND_INDEX,
+            total_ligands=total_ligands,
+            model_index=MODEL_INDEX,
+            total_models=model_counts[LIGAND_INDEX],
+            protein_index=PROTEIN_INDEX,
+            total_proteins=total_proteins,
+            ligand_name=ligand_name,
+            protein_name=protein_name
+        )
 
-                # Perform docking
-                docking_task = DockingTask(model_file, protein_file, MODEL_INDEX, vina_settings, RESULTS_DIR, DEBUG, score_manager)
-                docking_task.run()
+        # Perform docking
+        docking_task = DockingTask(model_file, protein_file, MODEL_INDEX, vina_settings, RESULTS_DIR, DEBUG, score_manager)
+        docking_task.run()
+        docked[protein_name].add(ligand_name_for_check)
 
-                # Record task duration
-                end_time = time.time()
+        # Record task duration
+        end_time = time.perf_counter()
 
-                task_duration = end_time - start_time
-                TASK_DURATIONS.append(task_duration) # For the rolling average
-                TOTAL_TASK_TIME += task_duration   # Add to our new overall total
-                
-                start_time = end_time
-                
-                # Update progress
-                PROTEIN_INDEX += 1
-                COMPLETED_TASKS += 1 # Increment the persistent counter
-                progress_manager.update_from_globals()
+        task_duration = end_time - start_time
+        TASK_DURATIONS.append(task_duration) # For the rolling average
+        TOTAL_TASK_TIME += task_duration   # Add to our new overall total
+        
+        start_time = end_time
+        
+        # Update progress
+        COMPLETED_TASKS += 1 # Increment the persistent counter
 
-            PROTEIN_INDEX = 0
-            MODEL_INDEX += 1
-            progress_manager.update_from_globals()
+    # Every task is done, so a rerun starts past the end
+    LIGAND_INDEX, MODEL_INDEX, PROTEIN_INDEX = total_ligands, 0, 0
+    progress_manager.update_from_globals(force=True)
 
-        MODEL_INDEX = 0
-        LIGAND_INDEX += 1
-        progress_manager.update_from_globals()
+    # Write out the last buffered scores before anything reads the scores files
+    score_manager.flush_scores()
 
     # Clear the entire terminal screen to remove the progress bars
     print("\033[H\033[J", end="") 
@@ -1613,10 +2488,10 @@ if __name__ == "__main__":
     score_manager.generate_comparison_scores(ligands, proteins, comparison_ligands)
 
     # Calculate and save the best ligands
-    score_manager.calculate_best_ligands(ligands, proteins, comparison_ligands)
+    best_ligand_rows = score_manager.calculate_best_ligands(ligands, proteins, comparison_ligands)
 
     # Rank and display the best ligands
-    score_manager.rank_and_display_best_ligands()
+    score_manager.rank_and_display_best_ligands(best_ligand_rows)
 
     # Generate per-ligand/model score summaries
     score_manager.generate_ligand_score_summaries(ligands, proteins, comparison_ligands)
@@ -1642,12 +2517,7 @@ if __name__ == "__main__":
     # Write failed docking summary
     score_manager.write_failed_docking_summary(FAILED_DOCKINGS)
 
-    # Write CSVs for all scores_<protein_name>.txt files
-    for protein_file in proteins:
-        protein_name = Path(protein_file).stem
-        scores_file = RESULTS_DIR / "scores" / f"scores_{protein_name}.txt"
-        if scores_file.exists():
-            score_manager.write_scores_csv(scores_file)
+    # The CSVs for all scores_<protein_name>.txt files were already written by calculate_top_dockers
 
     # After all scoring and summaries
     ranked_dir = RESULTS_DIR / "ranked_best_ligands"
@@ -1658,9 +2528,11 @@ if __name__ == "__main__":
         rms_file = RESULTS_DIR / "scores" / f"scores_{comp_lig_name}_RMS.txt"
         ranked_file = ranked_dir / f"ranked_best_ligands_{comp_lig_name}.txt"
         if rms_file.exists():
-            with open(rms_file) as f:
-                lines = [line for line in f if not line.startswith("#") and line.strip()]
-            sorted_lines = sorted(lines, key=lambda x: float(x.split()[0]))
+            # Parsed once into floats, then the line indexes are sorted (generate_comparison_scores wrote the
+            # file in RMS order, so this is a single pass for the sort)
+            table = load_scores(rms_file)
+            lines = table.lines
+            sorted_lines = [lines[i] for i in sorted(range(len(lines)), key=table.scores.__getitem__)]
             with open(ranked_file, "w") as f:
                 f.writelines(sorted_lines)
             print(f"Top ligands as substitutes for {comp_lig_name} saved to {ranked_file}.")
@@ -1672,20 +2544,16 @@ if __name__ == "__main__":
     summary_file = RESULTS_DIR / "scores" / "best_ligands_overall.txt"
     ligand_best_scores = {}
 
-    for protein_file in proteins:
-        protein_name = Path(protein_file).stem
+    for protein_name in protein_names:
         scores_file = RESULTS_DIR / "scores" / f"scores_{protein_name}.txt"
-        if scores_file.exists():
-            with open(scores_file) as f:
-                for line in f:
-                    if line.startswith("#"): continue
-                    score, ligand = line.strip().split()
-                    score = float(score)
-                    if ligand not in ligand_best_scores or score < ligand_best_scores[ligand]:
-                        ligand_best_scores[ligand] = score
+        # Already parsed (and cached) by calculate_top_dockers, so this is just a pass over two lists
+        table = load_scores(scores_file)
+        for ligand, score in zip(table.names, table.scores):
+            if ligand not in ligand_best_scores or score < ligand_best_scores[ligand]:
+                ligand_best_scores[ligand] = score
 
     # Sort ligands by their best score (lowest is best)
-    sorted_ligands = sorted(ligand_best_scores.items(), key=lambda x: x[1])
+    sorted_ligands = sorted(ligand_best_scores.items(), key=itemgetter(1))
     with open(summary_file, "w") as f:
         write_header(f, "Best ligands overall (by best docking score across all proteins).", columns=["BestScore", "Ligand"])
         for ligand, score in sorted_ligands:
@@ -1706,8 +2574,8 @@ if __name__ == "__main__":
         if top_dockers_file.exists():
             try:
                 with open(top_dockers_file, "r") as f:
-                    # Read all lines, skipping any comment headers
-                    lines = [line.strip() for line in f if not line.strip().startswith("#")]
+                    # The file is already sorted, so reading stops after the first 5 lines past the comment headers
+                    lines = list(islice((line.strip() for line in f if not line.strip().startswith("#")), 5))
                     if not lines:
                         print("  No scores found in the results file.")
                     else:
@@ -27,17 +27,17 @@ import sys
 # Handle command-line arguments for clearing cache
 #cache_manager = CacheManager(CACHE_DIR, RESULTS_DIR, LIGAND_DIR, PROTEIN_DIR, COMPARISON_LIGAND_DIR)
 if "--clear-cache" in sys.argv:
-    cache_manager.initialize_cache("clear")
+    ligands, _, _ = cache_manager.initialize_cache("clear")
 elif "--clear-everything" in sys.argv:
-    cache_manager.initialize_cache("clear-everything")
+    ligands, _, _ = cache_manager.initialize_cache("clear-everything")
 else:
-    cache_manager.initialize_cache()
+    ligands, _, _ = cache_manager.initialize_cache()
 
 
 
 
 # Load ligands, proteins, and comparison ligands
-ligands = [line.strip() for line in open(LIGAND_NAMES)]
+# (already listed by cache_manager.initialize_cache above)
 
 total_ligand_size = sum(Path(f).stat().st_size for f in ligands) if ligands else 0
 processed_size = 0